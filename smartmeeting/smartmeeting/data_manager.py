@@ -286,6 +286,13 @@ class DataManager:
                 return minute
         return None
 
+    def get_room_by_id(self, room_id):
+        """Get room by ID from session state"""
+        for room in st.session_state.mock_data["rooms"]:
+            if room.get("room_id") == room_id:
+                return room
+        return None
+
     def reset_to_default(self):
         """Reset all data to default mock state"""
         st.session_state.mock_data = {}
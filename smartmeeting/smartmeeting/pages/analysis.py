@@ -7,17 +7,16 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import plotly.io as pio
 import numpy as np
-from datetime import datetime, timedelta
-import calendar
-from collections import defaultdict
-import json
-import os
+import re
+import hashlib
 import logging
-import time
-from typing import Optional, Dict, Any, Callable
-from smartmeeting.tools import setup_pandasai_llm, create_pandasai_agent
+from collections import OrderedDict
+from functools import partial, singledispatchmethod
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Callable, Mapping
+from smartmeeting.tools import get_pandasai_llm, create_pandasai_agent
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -44,6 +43,7 @@ TEXTS = {
     "ai_executing": "🤖 正在执行AI分析...",
     "generating_visuals": "🤖 正在生成可视化...",
     "analysis_complete": "✅ AI 分析完成！",
+    "analysis_cached": "✅ 已加载相同查询的分析结果",
     "analysis_failed": "❌ AI 分析失败，请重试",
     "ai_not_initialized": "❌ AI Agent未初始化，请联系管理员",
     "error_occurred": "❌ 分析过程中出现错误: {error}",
@@ -51,6 +51,559 @@ TEXTS = {
     "no_visualizable_cols": "数据中没有可用的数值或分类字段来创建图表",
 }
 
+# 基础分析路由：正则分组 -> 分析方法，多个分组命中时按此顺序取第一个
+BASIC_ANALYSIS_KEYWORDS = {
+    "stat": "统计|概览|统计信息",
+    "vis": "图表|可视化|图形",
+    "trend": "趋势|变化",
+    "dist": "分布",
+    "corr": "关联|关系",
+    "eff": "效率|性能",
+}
+BASIC_ANALYSIS_ROUTES = (
+    ("stat", "_generate_statistical_analysis"),
+    ("vis", "_generate_visualization_analysis"),
+    ("trend", "_generate_trend_analysis"),
+    ("dist", "_generate_distribution_analysis"),
+    ("corr", "_generate_correlation_analysis"),
+    ("eff", "_generate_efficiency_analysis"),
+)
+BASIC_ANALYSIS_PATTERN = re.compile(
+    "|".join(
+        f"(?P<{group}>{keywords})"
+        for group, keywords in BASIC_ANALYSIS_KEYWORDS.items()
+    )
+)
+
+# 可视化路由：正则分组 -> 图表方法，多个分组命中时按此顺序展示
+VISUALIZATION_KEYWORDS = {
+    "stat": "统计|概览|分布|分析",
+    "eff": "效率|性能|完成率|利用率",
+    "corr": "关联|关系|相关性|影响",
+    "temporal": "趋势|时间|模式|变化",
+    "cmp": "对比|比较|差异|排名",
+}
+VISUALIZATION_ROUTES = (
+    ("stat", "_show_statistical_visualizations"),
+    ("eff", "_show_efficiency_visualizations"),
+    ("corr", "_show_correlation_visualizations"),
+    ("temporal", "_show_temporal_visualizations"),
+    ("cmp", "_show_comparison_visualizations"),
+)
+VISUALIZATION_PATTERN = re.compile(
+    "|".join(
+        f"(?P<{group}>{keywords})"
+        for group, keywords in VISUALIZATION_KEYWORDS.items()
+    )
+)
+MAX_QUERY_CHARTS = 2
+
+# 单一数据源名称 -> DataManager 数据类型（"全部数据" 为合并数据集）
+SOURCE_DATA_TYPES = MappingProxyType(
+    {
+        "会议数据": "meetings",
+        "任务数据": "tasks",
+        "用户数据": "users",
+        "会议室数据": "rooms",
+    }
+)
+
+# 各数据源的内置查询（只读）
+BUILT_IN_QUERIES = MappingProxyType(
+    {
+        "全部数据": MappingProxyType(
+            {
+                "跨数据源综合分析": "分析所有数据源的整体情况，包括各数据源的记录数量、分布特征，以及数据质量评估。生成可视化图表展示数据源分布和关键指标对比。",
+                "业务效率深度分析": "深入分析会议时长分布、任务完成率、用户活跃度等关键业务指标。计算效率评分，识别效率瓶颈，并提供优化建议。生成相关图表支持分析结果。",
+                "数据关联性挖掘": "分析会议、任务、用户、会议室之间的潜在关联关系。识别数据间的依赖性和影响因子，发现业务模式。使用热力图和网络图展示关联强度。",
+            }
+        ),
+        "会议数据": MappingProxyType(
+            {
+                "会议时长分布": "分析会议时长的分布情况，展示主要的时长区间。",
+                "会议数量趋势": "统计每月的会议数量变化趋势。",
+                "会议室使用统计": "统计各会议室的使用次数。",
+            }
+        ),
+        "任务数据": MappingProxyType(
+            {
+                "任务完成率统计": "统计任务的完成情况，计算完成率。",
+                "任务优先级分布": "分析不同优先级任务的分布情况。",
+                "部门任务统计": "统计各部门的任务分配情况。",
+            }
+        ),
+        "用户数据": MappingProxyType(
+            {
+                "用户角色分布": "分析用户在不同角色的分布情况。",
+                "部门人员统计": "统计各部门的人员分布情况。",
+                "用户活跃度": "分析用户的活跃程度。",
+            }
+        ),
+        "会议室数据": MappingProxyType(
+            {
+                "会议室容量分布": "分析会议室容量的分布情况。",
+                "会议室状态统计": "统计不同状态会议室的数量。",
+                "会议室使用率": "分析会议室的使用效率。",
+            }
+        ),
+    }
+)
+NO_BUILT_IN_QUERIES = MappingProxyType({})
+
+# 图表统一布局注册为模板，叠加在当前默认模板（Streamlit主题）之上
+pio.templates["smartmeeting"] = go.layout.Template(
+    layout=go.Layout(
+        margin=dict(l=20, r=20, t=50, b=20),
+        showlegend=True,
+        font=dict(size=12),
+        title_x=0.5,
+        height=400,
+    )
+)
+
+AGENT_MAX_ROWS = 2000
+# 每个会话最多保留的分析结果数，超出时淘汰最久未使用的
+MAX_CACHED_ANALYSES = 8
+
+PREVIEW_ROWS = 8
+HISTOGRAM_BINS = 20
+MAX_CORR_COLUMNS = 50
+MAX_CORR_ROWS = 50_000
+TIME_PROBE_ROWS = 32
+TIME_PARSE_ROWS = 100
+MAX_LINE_POINTS = 2000
+WEBGL_MIN_POINTS = 1000
+DATE_PREFIX_PATTERN = r"^\d{2,4}[-/]\d{1,2}"
+# 备用图表：正则分组 -> AnalysisPage 上的图表构建方法，按此顺序取第一个
+FALLBACK_CHART_KEYWORDS = {
+    "duration": "时长|duration",
+    "status": "状态|status",
+}
+FALLBACK_CHART_ROUTES = (
+    ("duration", "_fallback_duration_chart"),
+    ("status", "_fallback_status_chart"),
+)
+FALLBACK_CHART_PATTERN = re.compile(
+    "|".join(
+        f"(?P<{group}>{keywords})"
+        for group, keywords in FALLBACK_CHART_KEYWORDS.items()
+    )
+)
+
+
+def _chart_template() -> str:
+    """Return the chart template overlaid on the current default template.
+
+    Resolved at chart-build time, so a default template changed after import
+    (e.g. by Streamlit's theme) is picked up.
+
+    Returns:
+        Plotly template name such as ``"plotly+smartmeeting"``.
+    """
+    return f"{pio.templates.default}+smartmeeting"
+
+
+def _schema_fingerprint(df: pd.DataFrame) -> tuple:
+    """Hash only the column names and dtypes of a DataFrame.
+
+    Args:
+        df: DataFrame to fingerprint.
+
+    Returns:
+        Tuple of column names and dtype names.
+    """
+    return tuple(df.columns), tuple(map(str, df.dtypes))
+
+
+def _row_sample(df: pd.DataFrame, max_rows: int = AGENT_MAX_ROWS) -> pd.DataFrame:
+    """Bound the number of rows handed to the PandasAI agent or a statistic.
+
+    The sample is deterministic so cached results are reused across reruns.
+
+    Args:
+        df: Full DataFrame.
+        max_rows: Maximum number of rows to keep.
+
+    Returns:
+        The original DataFrame, or a random sample of it in original row order.
+    """
+    if len(df) <= max_rows:
+        return df
+    return df.sample(n=max_rows, random_state=0).sort_index()
+
+
+def _ensure_column_major(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a DataFrame whose NumPy-backed columns are contiguous in memory.
+
+    Frames wrapping a row-major 2-D array store each column with a stride;
+    ``DataFrame.copy`` re-lays the blocks out column by column.
+
+    Args:
+        df: DataFrame to check.
+
+    Returns:
+        The original DataFrame, or a column-major copy of it.
+    """
+    for i, dtype in enumerate(df.dtypes):
+        if isinstance(dtype, np.dtype) and not (
+            df.iloc[:, i].to_numpy(copy=False).flags.c_contiguous
+        ):
+            return df.copy()
+    return df
+
+
+def _histogram_bins(values: pd.Series, nbins: int = HISTOGRAM_BINS) -> tuple:
+    """Bin the finite values of a numeric series.
+
+    Args:
+        values: Numeric series to bin.
+        nbins: Number of equal-width bins.
+
+    Returns:
+        Tuple of (bin centers, bin widths, counts) arrays.
+    """
+    array = values.to_numpy(dtype="float64", na_value=np.nan)
+    counts, edges = np.histogram(array[np.isfinite(array)], bins=nbins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    return centers, np.diff(edges), counts
+
+
+def _as_float32_if_exact(values: pd.Series) -> pd.Series:
+    """Downcast a numeric series to float32 when no value loses precision.
+
+    Args:
+        values: Numeric series to downcast.
+
+    Returns:
+        A float32 copy of the series, or the original series if any value
+        would be rounded (large IDs, epoch seconds, money totals, ...).
+    """
+    array = values.to_numpy(dtype="float64", na_value=np.nan)
+    compact = array.astype("float32")
+    if np.array_equal(compact, array, equal_nan=True):
+        return pd.Series(compact, index=values.index, name=values.name)
+    return values
+
+
+@st.cache_data(
+    show_spinner=False,
+    max_entries=64,
+    hash_funcs={pd.DataFrame: _schema_fingerprint},
+)
+def _column_kinds(df: pd.DataFrame) -> tuple:
+    """Split the columns of a DataFrame into numeric and categorical ones.
+
+    Both groups come from a single pass over ``df.dtypes``. The result only
+    depends on the schema, so the cache key skips hashing the cell values.
+
+    Args:
+        df: DataFrame to inspect.
+
+    Returns:
+        Tuple of (numeric, categorical) column name indexes.
+    """
+    numeric, categorical = [], []
+    for col, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) or dtype == object:
+            categorical.append(col)
+        elif dtype.kind in "iufc":
+            numeric.append(col)
+    return pd.Index(numeric, dtype=object), pd.Index(categorical, dtype=object)
+
+
+def _numeric_cols(df: pd.DataFrame) -> pd.Index:
+    """Return the numeric column names of a DataFrame.
+
+    Args:
+        df: DataFrame to inspect.
+
+    Returns:
+        Index of numeric column names.
+    """
+    return _column_kinds(df)[0]
+
+
+def _categorical_cols(df: pd.DataFrame) -> pd.Index:
+    """Return the categorical (object or category dtype) column names of a DataFrame.
+
+    Args:
+        df: DataFrame to inspect.
+
+    Returns:
+        Index of categorical column names.
+    """
+    return _column_kinds(df)[1]
+
+
+def _frame_meta(df: pd.DataFrame) -> Dict[str, Any]:
+    """Collect the shape and column groups of a DataFrame in one place.
+
+    Args:
+        df: DataFrame to describe.
+
+    Returns:
+        Dictionary with ``n_rows``, ``n_cols``, ``numeric`` and ``categorical``.
+    """
+    numeric, categorical = _column_kinds(df)
+    return {
+        "n_rows": len(df),
+        "n_cols": len(df.columns),
+        "numeric": numeric,
+        "categorical": categorical,
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _value_counts(series: pd.Series) -> pd.Series:
+    """Return value counts of a column.
+
+    Takes the column rather than the frame so the cache key hashes only the
+    counted values. Categorical columns are counted with ``np.bincount`` over
+    their integer codes instead of hashing every value.
+
+    Args:
+        series: Column to count.
+
+    Returns:
+        Value counts sorted by frequency.
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.value_counts()
+
+    codes = series.cat.codes.to_numpy()
+    categories = series.cat.categories
+    counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+    order = np.argsort(-counts, kind="stable")
+    return pd.Series(
+        counts[order],
+        index=pd.CategoricalIndex(
+            categories[order], dtype=series.dtype, name=series.name
+        ),
+        name="count",
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _corr(df: pd.DataFrame) -> pd.DataFrame:
+    """Return the correlation matrix of the numeric columns.
+
+    Callers pass only the numeric columns so the cache key does not hash the
+    rest of the frame.
+
+    Wide frames are limited to the MAX_CORR_COLUMNS highest-variance columns
+    and long ones to a fixed sample of MAX_CORR_ROWS rows. Complete data goes
+    through a single ``np.corrcoef`` call; frames with missing values keep
+    pandas' pairwise-complete ``corr``.
+
+    Args:
+        df: Numeric columns to correlate.
+
+    Returns:
+        Pairwise correlation matrix.
+    """
+    numeric = _row_sample(df[_numeric_cols(df)], MAX_CORR_ROWS)
+    if numeric.shape[1] > MAX_CORR_COLUMNS:
+        numeric = numeric[numeric.var().nlargest(MAX_CORR_COLUMNS).index]
+    if numeric.shape[1] < 2:
+        return pd.DataFrame(index=numeric.columns, columns=numeric.columns)
+
+    values = numeric.to_numpy(dtype="float64", na_value=np.nan)
+    if np.isnan(values).any():
+        return numeric.corr()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = np.corrcoef(values, rowvar=False)
+    return pd.DataFrame(corr, index=numeric.columns, columns=numeric.columns)
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _corr_heatmap(corr_matrix: pd.DataFrame, template: str) -> go.Figure:
+    """Build a correlation heatmap straight from the matrix values.
+
+    Keyed on the small matrix, so the analysis text and the query
+    visualizations share one figure per dataset.
+
+    Args:
+        corr_matrix: Square correlation matrix.
+        template: Plotly template name, part of the cache key.
+
+    Returns:
+        Heatmap figure.
+    """
+    labels = list(corr_matrix.columns)
+    return go.Figure(
+        go.Heatmap(
+            z=corr_matrix.to_numpy(dtype="float32"),
+            x=labels,
+            y=labels,
+            colorscale="RdBu",
+            zmin=-1,
+            zmax=1,
+        ),
+        layout=dict(
+            template=template,
+            title="数值字段相关性热力图",
+            height=500,
+            yaxis_autorange="reversed",
+        ),
+    )
+
+
+def _index_fingerprint(index: pd.Index) -> tuple:
+    """Build a cache key for a pandas Index passed as chart data.
+
+    Args:
+        index: Index to fingerprint.
+
+    Returns:
+        Tuple of the index name, dtype and a hash of its values.
+    """
+    values_hash = pd.util.hash_pandas_object(index, index=False).to_numpy()
+    return index.name, str(index.dtype), values_hash.tobytes()
+
+
+# st.cache_resource 按精确类型匹配 hash_funcs，需逐个列出图表会收到的 Index 类型
+INDEX_HASH_FUNCS = {
+    index_type: _index_fingerprint
+    for index_type in (pd.Index, pd.CategoricalIndex, pd.DatetimeIndex, pd.RangeIndex)
+}
+
+
+@st.cache_resource(show_spinner=False, max_entries=64, hash_funcs=INDEX_HASH_FUNCS)
+def _px_figure(chart_name: str, *args, **kwargs) -> go.Figure:
+    """Build a Plotly Express figure, cached on the chart name and its inputs.
+
+    Cache hits return the shared figure without a pickle round trip, so
+    callers must not mutate it.
+
+    Args:
+        chart_name: Name of the ``plotly.express`` function, e.g. ``"bar"``.
+        *args: Positional arguments for the chart function.
+        **kwargs: Keyword arguments for the chart function.
+
+    Returns:
+        The created figure.
+    """
+    return getattr(px, chart_name)(*args, **kwargs)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _daily_counts(time_data: pd.Series) -> pd.Series:
+    """Count the rows of a time column per day, parsing it if needed.
+
+    Args:
+        time_data: Time column; only this column is hashed for the cache key.
+
+    Returns:
+        Daily counts indexed by day, with empty days filled with zero.
+    """
+    if not pd.api.types.is_datetime64_any_dtype(time_data):
+        # 先按 ISO8601 快速解析，仅对未解析的值逐个推断格式
+        parsed = pd.to_datetime(time_data, format="ISO8601", errors="coerce")
+        missed = parsed.isna() & time_data.notna()
+        if missed.any():
+            parsed[missed] = pd.to_datetime(
+                time_data[missed], format="mixed", errors="coerce"
+            )
+        time_data = parsed
+    # 排序后按日重采样走有序分组路径，并补齐空白日期使折线图横轴间距一致
+    days = pd.DatetimeIndex(time_data.dropna()).sort_values()
+    return pd.Series(1, index=days).resample("D").size()
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _time_columns(df: pd.DataFrame) -> list:
+    """Find time-related columns in a DataFrame.
+
+    Datetime columns are taken from the dtypes directly; string columns whose
+    values look like dates are confirmed by parsing the first TIME_PARSE_ROWS
+    rows rather than the whole column.
+
+    Args:
+        df: DataFrame to analyze.
+
+    Returns:
+        List of column names that are time-related.
+    """
+    time_cols = []
+    for col, dtype in df.dtypes.items():
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            time_cols.append(col)
+            continue
+        # 数值/布尔/时间差列不可能是日期字符串
+        if dtype.kind in "biufcm":
+            continue
+        is_category = isinstance(dtype, pd.CategoricalDtype)
+        values = dtype.categories if is_category else df[col]
+        kind = pd.api.types.infer_dtype(values, skipna=True)
+        if kind in ("datetime", "date"):
+            time_cols.append(col)
+            continue
+        if kind not in ("string", "mixed"):
+            continue
+        probe = df[col].dropna().head(TIME_PROBE_ROWS).astype(str)
+        if probe.empty or probe.str.match(DATE_PREFIX_PATTERN).mean() <= 0.5:
+            continue
+        sample = df[col].head(TIME_PARSE_ROWS)
+        parsed = pd.to_datetime(sample, format="mixed", errors="coerce")
+        if parsed.notna().to_numpy().mean() > 0.5:
+            time_cols.append(col)
+    return time_cols
+
+
+def _lttb_indices(values: np.ndarray, n_out: int) -> np.ndarray:
+    """Pick the points of an evenly spaced series to keep when downsampling.
+
+    Uses Largest-Triangle-Three-Buckets: the first and last points are kept,
+    and each bucket in between keeps the point forming the largest triangle
+    with the previously kept point and the mean of the next bucket.
+
+    Args:
+        values: Series values, one per equally spaced x position.
+        n_out: Number of points to keep, at least 3.
+
+    Returns:
+        Sorted positional indices of the kept points.
+    """
+    n = len(values)
+    if n <= n_out:
+        return np.arange(n)
+
+    y = values.astype("float64")
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    kept = np.empty(n_out, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = (stop + next_stop - 1) / 2
+        next_y = y[stop:next_stop].mean()
+        x = np.arange(start, stop)
+        # 三角形面积的两倍；只需比较大小
+        areas = np.abs(
+            (prev - next_x) * (y[start:stop] - y[prev])
+            - (prev - x) * (next_y - y[prev])
+        )
+        prev = start + int(areas.argmax())
+        kept[i + 1] = prev
+    return kept
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _numeric_stats(numeric: pd.DataFrame) -> pd.DataFrame:
+    """Return mean, std, min and max of the numeric columns.
+
+    Only the statistics the analyses report are computed, so no quantiles.
+
+    Args:
+        numeric: Numeric columns of the frame, e.g. ``df[_numeric_cols(df)]``,
+            so the cache key hashes only the described columns.
+
+    Returns:
+        Frame indexed by statistic name with one column per numeric column.
+    """
+    return numeric.agg(["mean", "std", "min", "max"])
+
 
 class AnalysisPage:
     """PandasAI demo page implementation with enhanced functionality for smart meeting system analysis"""
@@ -69,9 +622,20 @@ class AnalysisPage:
         # Initialize session state
         if "analysis_running" not in st.session_state:
             st.session_state.analysis_running = False
+        if "analysis_cache" not in st.session_state:
+            st.session_state.analysis_cache = OrderedDict()
+        self._source_fetchers = {
+            name: partial(data_manager.get_dataframe, data_type)
+            for name, data_type in SOURCE_DATA_TYPES.items()
+        }
+        self._source_fetchers["全部数据"] = self._get_merged_data
 
     def perform_ai_analysis(
-        self, query: str, sample_data: pd.DataFrame, llm: Any
+        self,
+        query: str,
+        sample_data: pd.DataFrame,
+        llm: Any,
+        cache_key: Optional[tuple] = None,
     ) -> Optional[str]:
         """Perform AI-powered analysis using PandasAI with fallback to basic analysis.
 
@@ -79,6 +643,8 @@ class AnalysisPage:
             query: User query for analysis.
             sample_data: DataFrame containing the data to analyze.
             llm: Initialized LLM instance for PandasAI.
+            cache_key: Session cache key under which a successful AI response
+                is stored; basic-analysis fallbacks are never cached.
 
         Returns:
             Analysis result as a string or None if both AI and basic analysis fail.
@@ -89,7 +655,9 @@ class AnalysisPage:
 
         try:
             if llm:
-                result = self._perform_pandasai_analysis(query, sample_data, llm)
+                result = self._perform_pandasai_analysis(
+                    query, sample_data, llm, cache_key
+                )
                 if result:
                     return result
                 st.info("AI分析无结果，使用基础分析")
@@ -106,7 +674,11 @@ class AnalysisPage:
                 return None
 
     def _perform_pandasai_analysis(
-        self, query: str, sample_data: pd.DataFrame, llm: Any
+        self,
+        query: str,
+        sample_data: pd.DataFrame,
+        llm: Any,
+        cache_key: Optional[tuple] = None,
     ) -> Optional[str]:
         """Perform intelligent analysis using PandasAI.
 
@@ -114,17 +686,26 @@ class AnalysisPage:
             query: User query for analysis.
             sample_data: DataFrame containing the data to analyze.
             llm: Initialized LLM instance for PandasAI.
+            cache_key: Session cache key for a successful response, if any.
 
         Returns:
             Analysis result as a string or None if analysis fails.
         """
         try:
-            agent = create_pandasai_agent(sample_data, llm)
+            # 智能体只看抽样数据，本地统计和备用图表仍使用完整数据
+            agent_data = _row_sample(sample_data)
+            agent = create_pandasai_agent(agent_data, llm)
             if not agent:
                 st.warning("AI智能体创建失败，使用基础分析")
                 return self._perform_basic_analysis(query, sample_data)
 
-            prompt = f"""请用中文分析以下数据：{query}
+            sample_note = (
+                f"\n（注意：数据共 {len(sample_data)} 行，"
+                f"此处为随机抽样的 {len(agent_data)} 行）"
+                if len(agent_data) < len(sample_data)
+                else ""
+            )
+            prompt = f"""请用中文分析以下数据：{query}{sample_note}
 
 要求：
 1. 分析结果必须用中文展示
@@ -137,22 +718,20 @@ class AnalysisPage:
    fig = px.bar(data, x='column', y='value', title='标题')
    return fig"""
 
-            start_time = time.time()
-            timeout = 60  # 60 seconds timeout
+            # 每次 LLM 请求由客户端的 LLM_REQUEST_TIMEOUT 限时，超时异常在下方回退
             response = agent.chat(prompt)
 
-            if time.time() - start_time > timeout:
-                st.warning("AI分析超时，使用基础分析")
-                return self._perform_basic_analysis(query, sample_data)
-
-            charts_displayed = self._handle_pandasai_response(
-                response, sample_data, query
-            )
-            if not charts_displayed:
-                st.info("AI未生成图表，创建基础可视化")
-                self._create_fallback_charts(sample_data, query)
+            self._show_pandasai_charts(response, sample_data, query)
+            if not response:
+                return None
 
-            return str(response) if response else None
+            if cache_key is not None:
+                # 只缓存AI成功的响应对象，命中时可重新绘制其图表
+                analysis_cache = st.session_state.analysis_cache
+                analysis_cache[cache_key] = response
+                if len(analysis_cache) > MAX_CACHED_ANALYSES:
+                    analysis_cache.popitem(last=False)
+            return str(response)
 
         except Exception as e:
             logger.warning(f"PandasAI analysis failed: {e}")
@@ -172,19 +751,16 @@ class AnalysisPage:
             Analysis result as a string or None if analysis fails.
         """
         try:
-            query_lower = query.lower()
-            if any(k in query_lower for k in ["统计", "概览", "统计信息"]):
-                return self._generate_statistical_analysis(sample_data)
-            elif any(k in query_lower for k in ["图表", "可视化", "图形"]):
-                return self._generate_visualization_analysis(sample_data)
-            elif any(k in query_lower for k in ["趋势", "变化"]):
-                return self._generate_trend_analysis(sample_data)
-            elif "分布" in query_lower:
-                return self._generate_distribution_analysis(sample_data)
-            elif any(k in query_lower for k in ["关联", "关系"]):
-                return self._generate_correlation_analysis(sample_data)
-            elif any(k in query_lower for k in ["效率", "性能"]):
-                return self._generate_efficiency_analysis(sample_data)
+            matched = {
+                match.lastgroup
+                for match in BASIC_ANALYSIS_PATTERN.finditer(query.lower())
+            }
+            method_name = next(
+                (name for group, name in BASIC_ANALYSIS_ROUTES if group in matched),
+                None,
+            )
+            if method_name:
+                return getattr(self, method_name)(sample_data)
             return self._generate_general_analysis(sample_data, query)
         except Exception as e:
             logger.error(f"Basic analysis failed: {e}")
@@ -200,26 +776,33 @@ class AnalysisPage:
         Returns:
             Statistical analysis as a markdown string.
         """
-        analysis = "## 📊 数据统计分析\n\n"
-        analysis += f"- **总记录数**: {len(data)}\n"
-        analysis += f"- **字段数**: {len(data.columns)}\n\n"
+        parts = [
+            "## 📊 数据统计分析\n\n",
+            f"- **总记录数**: {len(data)}\n",
+            f"- **字段数**: {len(data.columns)}\n\n",
+        ]
 
-        numeric_cols = data.select_dtypes(include=["number"]).columns
+        numeric_cols = _numeric_cols(data)
         if numeric_cols.any():
-            analysis += "### 数值型字段统计\n"
-            stats = data[numeric_cols].describe()
-            analysis += f"- 数值字段: {', '.join(numeric_cols)}\n"
-            analysis += f"- 平均值范围: {stats.loc['mean'].min():.2f} - {stats.loc['mean'].max():.2f}\n"
-            analysis += f"- 标准差范围: {stats.loc['std'].min():.2f} - {stats.loc['std'].max():.2f}\n\n"
+            stats = _numeric_stats(data[numeric_cols])
+            parts.append("### 数值型字段统计\n")
+            parts.append(f"- 数值字段: {', '.join(numeric_cols)}\n")
+            parts.append(
+                f"- 平均值范围: {stats.loc['mean'].min():.2f} - {stats.loc['mean'].max():.2f}\n"
+            )
+            parts.append(
+                f"- 标准差范围: {stats.loc['std'].min():.2f} - {stats.loc['std'].max():.2f}\n\n"
+            )
 
-        categorical_cols = data.select_dtypes(include=["object"]).columns
+        categorical_cols = _categorical_cols(data)
         if categorical_cols.any():
-            analysis += "### 分类型字段统计\n"
-            for col in categorical_cols[:3]:
-                unique_count = data[col].nunique()
-                analysis += f"- **{col}**: {unique_count} 个唯一值\n"
+            parts.append("### 分类型字段统计\n")
+            nuniques = data[categorical_cols[:3]].nunique()
+            parts.extend(
+                f"- **{col}**: {count} 个唯一值\n" for col, count in nuniques.items()
+            )
 
-        return analysis
+        return "".join(parts)
 
     def _generate_visualization_analysis(self, data: pd.DataFrame) -> str:
         """Generate visualization analysis suggestions in Chinese.
@@ -230,23 +813,27 @@ class AnalysisPage:
         Returns:
             Visualization suggestions as a markdown string.
         """
-        analysis = "## 📈 数据可视化分析\n\n"
-        numeric_cols = data.select_dtypes(include=["number"]).columns
-        categorical_cols = data.select_dtypes(include=["object"]).columns
+        parts = ["## 📈 数据可视化分析\n\n"]
+        numeric_cols = _numeric_cols(data)
+        categorical_cols = _categorical_cols(data)
 
         if numeric_cols.any():
-            analysis += "### 数值型数据可视化建议\n"
-            analysis += "- 直方图: 查看数值分布\n"
-            analysis += "- 箱线图: 识别异常值\n"
+            parts.append(
+                "### 数值型数据可视化建议\n"
+                "- 直方图: 查看数值分布\n"
+                "- 箱线图: 识别异常值\n"
+            )
             if len(numeric_cols) >= 2:
-                analysis += "- 散点图: 分析变量关系\n"
+                parts.append("- 散点图: 分析变量关系\n")
 
         if categorical_cols.any():
-            analysis += "\n### 分类型数据可视化建议\n"
-            analysis += "- 柱状图: 显示类别频次\n"
-            analysis += "- 饼图: 显示比例分布\n"
+            parts.append(
+                "\n### 分类型数据可视化建议\n"
+                "- 柱状图: 显示类别频次\n"
+                "- 饼图: 显示比例分布\n"
+            )
 
-        return analysis
+        return "".join(parts)
 
     def _generate_trend_analysis(self, data: pd.DataFrame) -> str:
         """Generate trend analysis in Chinese.
@@ -257,21 +844,25 @@ class AnalysisPage:
         Returns:
             Trend analysis as a markdown string.
         """
-        analysis = "## 📈 趋势分析\n\n"
-        time_cols = self._find_time_columns(data)
+        parts = ["## 📈 趋势分析\n\n"]
+        time_cols = _time_columns(data)
 
         if time_cols:
-            analysis += f"发现时间相关字段: {', '.join(time_cols)}\n"
-            analysis += "建议进行时间序列分析:\n"
-            analysis += "- 时间趋势图\n"
-            analysis += "- 周期性分析\n"
-            analysis += "- 季节性模式识别\n"
+            parts.append(f"发现时间相关字段: {', '.join(time_cols)}\n")
+            parts.append(
+                "建议进行时间序列分析:\n"
+                "- 时间趋势图\n"
+                "- 周期性分析\n"
+                "- 季节性模式识别\n"
+            )
         else:
-            analysis += "未发现明显的时间字段，建议:\n"
-            analysis += "- 检查是否有日期/时间列\n"
-            analysis += "- 考虑添加时间维度进行分析\n"
+            parts.append(
+                "未发现明显的时间字段，建议:\n"
+                "- 检查是否有日期/时间列\n"
+                "- 考虑添加时间维度进行分析\n"
+            )
 
-        return analysis
+        return "".join(parts)
 
     def _generate_distribution_analysis(self, data: pd.DataFrame) -> str:
         """Generate distribution analysis in Chinese.
@@ -282,23 +873,27 @@ class AnalysisPage:
         Returns:
             Distribution analysis as a markdown string.
         """
-        analysis = "## 📊 分布分析\n\n"
-        numeric_cols = data.select_dtypes(include=["number"]).columns
-        categorical_cols = data.select_dtypes(include=["object"]).columns
+        parts = ["## 📊 分布分析\n\n"]
+        numeric_cols = _numeric_cols(data)
+        categorical_cols = _categorical_cols(data)
 
         if numeric_cols.any():
-            analysis += "### 数值型数据分布\n"
-            for col in numeric_cols[:3]:
-                stats = data[col].describe()
-                analysis += f"- **{col}**: 均值={stats['mean']:.2f}, 标准差={stats['std']:.2f}\n"
+            parts.append("### 数值型数据分布\n")
+            stats = _numeric_stats(data[numeric_cols])
+            parts.extend(
+                f"- **{col}**: 均值={stats.at['mean', col]:.2f}, 标准差={stats.at['std', col]:.2f}\n"
+                for col in numeric_cols[:3]
+            )
 
         if categorical_cols.any():
-            analysis += "\n### 分类型数据分布\n"
+            parts.append("\n### 分类型数据分布\n")
             for col in categorical_cols[:3]:
-                value_counts = data[col].value_counts()
-                analysis += f"- **{col}**: 最多值='{value_counts.index[0]}' ({value_counts.iloc[0]}次)\n"
+                value_counts = _value_counts(data[col])
+                parts.append(
+                    f"- **{col}**: 最多值='{value_counts.index[0]}' ({value_counts.iloc[0]}次)\n"
+                )
 
-        return analysis
+        return "".join(parts)
 
     def _generate_correlation_analysis(self, data: pd.DataFrame) -> str:
         """Generate correlation analysis in Chinese.
@@ -309,40 +904,40 @@ class AnalysisPage:
         Returns:
             Correlation analysis as a markdown string.
         """
-        analysis = "## 🔗 关联关系分析\n\n"
-        numeric_cols = data.select_dtypes(include=["number"]).columns
+        parts = ["## 🔗 关联关系分析\n\n"]
+        numeric_cols = _numeric_cols(data)
 
         if len(numeric_cols) >= 2:
-            corr_matrix = data[numeric_cols].corr()
-            fig = self._create_plotly_chart(
-                px.imshow,
-                corr_matrix,
-                title="数值字段相关性热力图",
-                color_continuous_scale="RdBu",
-                aspect="auto",
-                height=500,
+            corr_matrix = _corr(data[numeric_cols])
+            st.plotly_chart(
+                _corr_heatmap(corr_matrix, _chart_template()),
+                use_container_width=True,
             )
-            st.plotly_chart(fig, use_container_width=True)
 
-            analysis += "### 相关性分析结果\n"
-            analysis += f"- 分析了 {len(numeric_cols)} 个数值字段之间的相关性\n"
+            parts.append("### 相关性分析结果\n")
+            parts.append(f"- 分析了 {len(numeric_cols)} 个数值字段之间的相关性\n")
+            values = corr_matrix.to_numpy(dtype="float64")
+            labels = corr_matrix.columns.to_numpy()
+            # 只看上三角（不含对角线），一次性找出所有强相关字段对
+            with np.errstate(invalid="ignore"):
+                strong_mask = np.triu(np.abs(values) > 0.7, k=1)
             strong_corr = [
-                (corr_matrix.columns[i], corr_matrix.columns[j], corr_matrix.iloc[i, j])
-                for i in range(len(corr_matrix.columns))
-                for j in range(i + 1, len(corr_matrix.columns))
-                if abs(corr_matrix.iloc[i, j]) > 0.7
+                (labels[i], labels[j], values[i, j])
+                for i, j in np.argwhere(strong_mask)
             ]
 
             if strong_corr:
-                analysis += "- **强相关性发现**:\n"
-                for var1, var2, corr in strong_corr:
-                    analysis += f"  - {var1} 与 {var2}: {corr:.3f}\n"
+                parts.append("- **强相关性发现**:\n")
+                parts.extend(
+                    f"  - {var1} 与 {var2}: {corr:.3f}\n"
+                    for var1, var2, corr in strong_corr
+                )
             else:
-                analysis += "- 未发现强相关性关系\n"
+                parts.append("- 未发现强相关性关系\n")
         else:
-            analysis += "数值字段不足，无法进行相关性分析\n"
+            parts.append("数值字段不足，无法进行相关性分析\n")
 
-        return analysis
+        return "".join(parts)
 
     def _generate_efficiency_analysis(self, data: pd.DataFrame) -> str:
         """Generate efficiency analysis in Chinese.
@@ -353,10 +948,11 @@ class AnalysisPage:
         Returns:
             Efficiency analysis as a markdown string.
         """
-        analysis = "## ⚡ 效率性能分析\n\n"
+        parts = ["## ⚡ 效率性能分析\n\n"]
+        col_set = frozenset(data.columns)
 
-        if "数据源" in data.columns:
-            source_counts = data["数据源"].value_counts()
+        if "数据源" in col_set:
+            source_counts = _value_counts(data["数据源"])
             fig = self._create_plotly_chart(
                 px.bar,
                 x=source_counts.index,
@@ -367,41 +963,42 @@ class AnalysisPage:
                 color_continuous_scale="viridis",
                 height=400,
             )
-            st.plotly_chart(fig, use_container_width=True)
+            if fig is not None:
+                st.plotly_chart(fig, use_container_width=True)
 
-            analysis += "### 数据源效率分析\n"
-            analysis += f"- 总记录数: {len(data)}\n"
-            analysis += f"- 数据源分布: {', '.join([f'{k}({v})' for k, v in source_counts.items()])}\n"
-            for source, count in source_counts.items():
-                percentage = (count / len(data)) * 100
-                analysis += f"- {source}: {count} 条记录 ({percentage:.1f}%)\n"
+            parts.append("### 数据源效率分析\n")
+            parts.append(f"- 总记录数: {len(data)}\n")
+            parts.append(
+                f"- 数据源分布: {', '.join([f'{k}({v})' for k, v in source_counts.items()])}\n"
+            )
+            parts.extend(
+                f"- {source}: {count} 条记录 ({(count / len(data)) * 100:.1f}%)\n"
+                for source, count in source_counts.items()
+            )
 
-        elif "时长" in data.columns:
-            duration_stats = data["时长"].describe()
-            fig = self._create_plotly_chart(
-                px.histogram,
-                data,
-                x="时长",
+        elif "时长" in col_set:
+            duration_stats = _numeric_stats(data[_numeric_cols(data)])["时长"]
+            fig = self._histogram_figure(
+                data["时长"],
                 title="会议时长分布",
-                nbins=20,
-                color_discrete_sequence=["#1f77b4"],
-                height=400,
+                xaxis_title="时长",
+                color="#1f77b4",
             )
             st.plotly_chart(fig, use_container_width=True)
 
-            analysis += "### 会议时长效率分析\n"
-            analysis += f"- 平均时长: {duration_stats['mean']:.1f} 分钟\n"
-            analysis += f"- 最短时长: {duration_stats['min']:.1f} 分钟\n"
-            analysis += f"- 最长时长: {duration_stats['max']:.1f} 分钟\n"
-            analysis += f"- 时长标准差: {duration_stats['std']:.1f} 分钟\n"
-            analysis += "- **效率建议**: " + (
-                "平均会议时长较长，建议优化会议流程\n"
+            parts.append("### 会议时长效率分析\n")
+            parts.append(f"- 平均时长: {duration_stats['mean']:.1f} 分钟\n")
+            parts.append(f"- 最短时长: {duration_stats['min']:.1f} 分钟\n")
+            parts.append(f"- 最长时长: {duration_stats['max']:.1f} 分钟\n")
+            parts.append(f"- 时长标准差: {duration_stats['std']:.1f} 分钟\n")
+            parts.append(
+                "- **效率建议**: 平均会议时长较长，建议优化会议流程\n"
                 if duration_stats["mean"] > 60
-                else "会议时长合理，效率良好\n"
+                else "- **效率建议**: 会议时长合理，效率良好\n"
             )
 
-        elif "状态" in data.columns:
-            status_counts = data["状态"].value_counts()
+        elif "状态" in col_set:
+            status_counts = _value_counts(data["状态"])
             fig = self._create_plotly_chart(
                 px.pie,
                 values=status_counts.values,
@@ -410,28 +1007,27 @@ class AnalysisPage:
                 color_discrete_sequence=px.colors.qualitative.Set3,
                 height=400,
             )
-            st.plotly_chart(fig, use_container_width=True)
+            if fig is not None:
+                st.plotly_chart(fig, use_container_width=True)
 
             total_tasks = len(data)
             completed_tasks = status_counts.get("完成", 0)
             completion_rate = (
                 (completed_tasks / total_tasks) * 100 if total_tasks > 0 else 0
             )
-            analysis += "### 任务完成效率分析\n"
-            analysis += f"- 总任务数: {total_tasks}\n"
-            analysis += f"- 已完成任务: {completed_tasks}\n"
-            analysis += f"- 完成率: {completion_rate:.1f}%\n"
-            analysis += "- **效率评估**: " + (
-                "任务完成率优秀\n"
-                if completion_rate >= 80
-                else (
-                    "任务完成率良好\n"
-                    if completion_rate >= 60
-                    else "任务完成率需要改进\n"
-                )
-            )
+            if completion_rate >= 80:
+                assessment = "任务完成率优秀"
+            elif completion_rate >= 60:
+                assessment = "任务完成率良好"
+            else:
+                assessment = "任务完成率需要改进"
+            parts.append("### 任务完成效率分析\n")
+            parts.append(f"- 总任务数: {total_tasks}\n")
+            parts.append(f"- 已完成任务: {completed_tasks}\n")
+            parts.append(f"- 完成率: {completion_rate:.1f}%\n")
+            parts.append(f"- **效率评估**: {assessment}\n")
 
-        return analysis
+        return "".join(parts)
 
     def _generate_general_analysis(self, data: pd.DataFrame, query: str) -> str:
         """Generate general analysis based on query.
@@ -443,27 +1039,29 @@ class AnalysisPage:
         Returns:
             General analysis as a markdown string.
         """
-        analysis = f"### 🤖 AI 分析结果\n\n针对查询: **{query}**\n\n"
-        analysis += "### 数据洞察\n"
-        analysis += f"- 数据集包含 {len(data)} 条记录\n"
-        analysis += f"- 涵盖 {len(data.columns)} 个字段\n"
-
-        numeric_cols = data.select_dtypes(include=["number"]).columns
+        parts = [
+            f"### 🤖 AI 分析结果\n\n针对查询: **{query}**\n\n",
+            "### 数据洞察\n",
+            f"- 数据集包含 {len(data)} 条记录\n",
+            f"- 涵盖 {len(data.columns)} 个字段\n",
+        ]
+
+        numeric_cols = _numeric_cols(data)
         if numeric_cols.any():
-            analysis += f"- 包含 {len(numeric_cols)} 个数值型字段\n"
+            parts.append(f"- 包含 {len(numeric_cols)} 个数值型字段\n")
             st.markdown("#### 📊 数值字段分布")
             for col in numeric_cols[:2]:
-                fig = self._create_plotly_chart(
-                    px.histogram, data, x=col, title=f"{col} 分布", nbins=20
+                fig = self._histogram_figure(
+                    data[col], title=f"{col} 分布", xaxis_title=col
                 )
                 st.plotly_chart(fig, use_container_width=True)
 
-        categorical_cols = data.select_dtypes(include=["object"]).columns
+        categorical_cols = _categorical_cols(data)
         if categorical_cols.any():
-            analysis += f"- 包含 {len(categorical_cols)} 个分类型字段\n"
+            parts.append(f"- 包含 {len(categorical_cols)} 个分类型字段\n")
             st.markdown("#### 📈 分类字段分布")
             for col in categorical_cols[:2]:
-                value_counts = data[col].value_counts()
+                value_counts = _value_counts(data[col])
                 fig = self._create_plotly_chart(
                     px.bar,
                     x=value_counts.index,
@@ -473,13 +1071,16 @@ class AnalysisPage:
                     color=value_counts.values,
                     color_continuous_scale="viridis",
                 )
-                st.plotly_chart(fig, use_container_width=True)
+                if fig is not None:
+                    st.plotly_chart(fig, use_container_width=True)
 
-        analysis += "\n### 建议\n"
-        analysis += "- 尝试更具体的查询，如'显示统计信息'或'生成图表'\n"
-        analysis += "- 使用内置查询获取常用分析结果\n"
+        parts.append(
+            "\n### 建议\n"
+            "- 尝试更具体的查询，如'显示统计信息'或'生成图表'\n"
+            "- 使用内置查询获取常用分析结果\n"
+        )
 
-        return analysis
+        return "".join(parts)
 
     def show(self) -> None:
         """Display the main analysis page."""
@@ -503,7 +1104,7 @@ class AnalysisPage:
         """
         )
 
-        llm = setup_pandasai_llm()
+        llm = get_pandasai_llm()
 
         if llm:
             st.success(TEXTS["ai_enabled"])
@@ -519,7 +1120,7 @@ class AnalysisPage:
             st.info(TEXTS["no_data"])
             return
 
-        self._show_data_overview(sample_data)
+        self._show_data_overview(_frame_meta(sample_data))
         self._show_data_preview(sample_data)
         self._show_analysis_interface(sample_data, llm, selected_source)
 
@@ -532,14 +1133,8 @@ class AnalysisPage:
         Returns:
             DataFrame containing the selected data.
         """
-        data_mapping = {
-            "全部数据": self._get_merged_data,
-            "会议数据": lambda: self.data_manager.get_dataframe("meetings"),
-            "任务数据": lambda: self.data_manager.get_dataframe("tasks"),
-            "用户数据": lambda: self.data_manager.get_dataframe("users"),
-            "会议室数据": lambda: self.data_manager.get_dataframe("rooms"),
-        }
-        return data_mapping.get(selected_source, lambda: pd.DataFrame())()
+        fetcher = self._source_fetchers.get(selected_source)
+        return _ensure_column_major(fetcher() if fetcher else pd.DataFrame())
 
     def _get_merged_data(self) -> pd.DataFrame:
         """Get merged dataset from all sources.
@@ -553,27 +1148,23 @@ class AnalysisPage:
         rooms_df = self.data_manager.get_dataframe("rooms")
         return self._create_merged_dataset(meetings_df, tasks_df, users_df, rooms_df)
 
-    def _show_data_overview(self, sample_data: pd.DataFrame) -> None:
+    def _show_data_overview(self, meta: Dict[str, Any]) -> None:
         """Display data overview.
 
         Args:
-            sample_data: DataFrame to display overview for.
+            meta: Frame metadata from ``_frame_meta``.
         """
         st.markdown(TEXTS["data_overview"])
         col1, col2, col3, col4 = st.columns(4)
 
         with col1:
-            st.metric("总记录数", len(sample_data))
+            st.metric("总记录数", meta["n_rows"])
         with col2:
-            st.metric("字段数", len(sample_data.columns))
+            st.metric("字段数", meta["n_cols"])
         with col3:
-            st.metric(
-                "数值字段", len(sample_data.select_dtypes(include=["number"]).columns)
-            )
+            st.metric("数值字段", len(meta["numeric"]))
         with col4:
-            st.metric(
-                "分类字段", len(sample_data.select_dtypes(include=["object"]).columns)
-            )
+            st.metric("分类字段", len(meta["categorical"]))
 
         st.markdown("---")
 
@@ -585,7 +1176,7 @@ class AnalysisPage:
         """
         st.markdown(TEXTS["data_preview"])
         with st.expander("查看数据详情", expanded=True):
-            st.dataframe(sample_data.head(8), use_container_width=True)
+            st.dataframe(sample_data.head(PREVIEW_ROWS), use_container_width=True)
         st.markdown("---")
 
     def _show_analysis_interface(
@@ -663,17 +1254,33 @@ class AnalysisPage:
             return
 
         st.session_state.analysis_running = True
-        progress_bar = st.progress(0)
+        # 占位符在缓存命中时保持为空，不绘制进度条
+        progress_bar = st.empty()
         status_text = st.empty()
 
         try:
+            # 相同查询和数据的AI结果已缓存时直接重放，跳过进度条更新
+            cache_key = self._analysis_cache_key(query, sample_data)
+            analysis_cache = st.session_state.analysis_cache
+            cached_response = analysis_cache.get(cache_key)
+            if cached_response is not None:
+                analysis_cache.move_to_end(cache_key)
+                st.success(TEXTS["analysis_cached"])
+                self._show_pandasai_charts(cached_response, sample_data, query)
+                self._display_analysis_results(
+                    str(cached_response), sample_data, query
+                )
+                return
+
             status_text.text(TEXTS["ai_analyzing"])
             progress_bar.progress(25)
 
             if llm:
                 status_text.text(TEXTS["ai_executing"])
                 progress_bar.progress(50)
-                analysis_result = self.perform_ai_analysis(query, sample_data, llm)
+                analysis_result = self.perform_ai_analysis(
+                    query, sample_data, llm, cache_key
+                )
                 progress_bar.progress(75)
                 status_text.text(TEXTS["generating_visuals"])
 
@@ -699,6 +1306,36 @@ class AnalysisPage:
         finally:
             st.session_state.analysis_running = False
 
+    def _analysis_cache_key(self, query: str, sample_data: pd.DataFrame) -> tuple:
+        """Build the session cache key for an analysis result.
+
+        Args:
+            query: User query for analysis.
+            sample_data: DataFrame to analyze.
+
+        Returns:
+            Tuple identifying the query and the content of the data.
+        """
+        # 按行顺序对逐行哈希整体摘要，行顺序或单元格互换都会改变键
+        row_hashes = pd.util.hash_pandas_object(sample_data, index=True).to_numpy()
+        digest = hashlib.blake2b(row_hashes.tobytes(), digest_size=16).hexdigest()
+        return query, _schema_fingerprint(sample_data), digest
+
+    def _show_pandasai_charts(
+        self, response: Any, sample_data: pd.DataFrame, query: str
+    ) -> None:
+        """Display the charts of a PandasAI response, or fallback charts.
+
+        Args:
+            response: PandasAI response object, fresh or from the session cache.
+            sample_data: DataFrame analyzed.
+            query: User query.
+        """
+        charts_displayed = self._handle_pandasai_response(response, sample_data, query)
+        if not charts_displayed:
+            st.info("AI未生成图表，创建基础可视化")
+            self._create_fallback_charts(sample_data, query)
+
     def _display_analysis_results(
         self, analysis_result: str, sample_data: pd.DataFrame, query: str
     ) -> None:
@@ -721,43 +1358,13 @@ class AnalysisPage:
             sample_data: DataFrame to visualize.
             query: User query.
         """
-        query_lower = query.lower()
-        visualization_mapping: Dict[str, Callable] = {
-            "统计": self._show_statistical_visualizations,
-            "概览": self._show_statistical_visualizations,
-            "分布": self._show_statistical_visualizations,
-            "分析": self._show_statistical_visualizations,
-            "效率": self._show_efficiency_visualizations,
-            "性能": self._show_efficiency_visualizations,
-            "完成率": self._show_efficiency_visualizations,
-            "利用率": self._show_efficiency_visualizations,
-            "关联": self._show_correlation_visualizations,
-            "关系": self._show_correlation_visualizations,
-            "相关性": self._show_correlation_visualizations,
-            "影响": self._show_correlation_visualizations,
-            "趋势": self._show_temporal_visualizations,
-            "时间": self._show_temporal_visualizations,
-            "模式": self._show_temporal_visualizations,
-            "变化": self._show_temporal_visualizations,
-            "对比": self._show_comparison_visualizations,
-            "比较": self._show_comparison_visualizations,
-            "差异": self._show_comparison_visualizations,
-            "排名": self._show_comparison_visualizations,
+        matched = {
+            match.lastgroup for match in VISUALIZATION_PATTERN.finditer(query.lower())
         }
+        methods = [name for group, name in VISUALIZATION_ROUTES if group in matched]
 
-        executed_methods = set()
-        chart_count = 0
-        max_charts = 2
-
-        for keyword, method in visualization_mapping.items():
-            if (
-                keyword in query_lower
-                and method not in executed_methods
-                and chart_count < max_charts
-            ):
-                method(sample_data, query)
-                executed_methods.add(method)
-                chart_count += 1
+        for method_name in methods[:MAX_QUERY_CHARTS]:
+            getattr(self, method_name)(sample_data, query)
 
     def _show_statistical_visualizations(
         self, sample_data: pd.DataFrame, query: str
@@ -769,22 +1376,20 @@ class AnalysisPage:
             query: User query.
         """
         st.markdown("#### 📈 统计可视化")
-        numeric_cols = sample_data.select_dtypes(include=["number"]).columns
-        categorical_cols = sample_data.select_dtypes(include=["object"]).columns
+        numeric_cols = _numeric_cols(sample_data)
+        categorical_cols = _categorical_cols(sample_data)
 
         if numeric_cols.any():
-            self._create_plotly_chart(
-                px.histogram,
-                sample_data,
-                x=numeric_cols[0],
+            fig = self._histogram_figure(
+                sample_data[numeric_cols[0]],
                 title=f"{numeric_cols[0]} 分布",
-                nbins=20,
-                color_discrete_sequence=["#1f77b4"],
+                xaxis_title=numeric_cols[0],
+                color="#1f77b4",
             )
-            st.plotly_chart(st.session_state.last_chart, use_container_width=True)
+            st.plotly_chart(fig, use_container_width=True)
         elif categorical_cols.any():
-            value_counts = sample_data[categorical_cols[0]].value_counts()
-            self._create_plotly_chart(
+            value_counts = _value_counts(sample_data[categorical_cols[0]])
+            fig = self._create_plotly_chart(
                 px.bar,
                 x=value_counts.index,
                 y=value_counts.values,
@@ -793,7 +1398,8 @@ class AnalysisPage:
                 color=value_counts.values,
                 color_continuous_scale="viridis",
             )
-            st.plotly_chart(st.session_state.last_chart, use_container_width=True)
+            if fig is not None:
+                st.plotly_chart(fig, use_container_width=True)
 
     def _show_efficiency_visualizations(
         self, sample_data: pd.DataFrame, query: str
@@ -805,23 +1411,22 @@ class AnalysisPage:
             query: User query.
         """
         st.markdown("#### ⚡ 效率分析可视化")
-        if "数据源" in sample_data.columns:
+        col_set = frozenset(sample_data.columns)
+        if "数据源" in col_set:
             self._show_data_source_efficiency(sample_data)
-        elif "时长" in sample_data.columns:
+        elif "时长" in col_set:
             self._show_duration_efficiency(sample_data)
-        elif "状态" in sample_data.columns:
+        elif "状态" in col_set:
             self._show_status_efficiency(sample_data)
         else:
-            numeric_cols = sample_data.select_dtypes(include=["number"]).columns
+            numeric_cols = _numeric_cols(sample_data)
             if numeric_cols.any():
-                self._create_plotly_chart(
-                    px.histogram,
-                    sample_data,
-                    x=numeric_cols[0],
+                fig = self._histogram_figure(
+                    sample_data[numeric_cols[0]],
                     title=f"{numeric_cols[0]} 效率分布",
-                    nbins=20,
+                    xaxis_title=numeric_cols[0],
                 )
-                st.plotly_chart(st.session_state.last_chart, use_container_width=True)
+                st.plotly_chart(fig, use_container_width=True)
 
     def _show_data_source_efficiency(self, sample_data: pd.DataFrame) -> None:
         """Display data source efficiency visualization.
@@ -829,15 +1434,16 @@ class AnalysisPage:
         Args:
             sample_data: DataFrame containing data source information.
         """
-        source_efficiency = sample_data["数据源"].value_counts()
-        self._create_plotly_chart(
+        source_efficiency = _value_counts(sample_data["数据源"])
+        fig = self._create_plotly_chart(
             px.pie,
             values=source_efficiency.values,
             names=source_efficiency.index,
             title="各数据源记录分布",
             color_discrete_sequence=px.colors.qualitative.Set3,
         )
-        st.plotly_chart(st.session_state.last_chart, use_container_width=True)
+        if fig is not None:
+            st.plotly_chart(fig, use_container_width=True)
 
     def _show_duration_efficiency(self, sample_data: pd.DataFrame) -> None:
         """Display duration efficiency visualization and metrics.
@@ -845,26 +1451,28 @@ class AnalysisPage:
         Args:
             sample_data: DataFrame containing duration information.
         """
-        duration_stats = sample_data["时长"].describe()
-        efficiency_score = min(100, max(0, 100 - (duration_stats["mean"] - 30) * 2))
+        # 只需要均值/最小/最大，避免 describe() 额外计算分位数
+        durations = sample_data["时长"].to_numpy(dtype="float32", na_value=np.nan)
+        mean_duration = float(np.nanmean(durations))
+        efficiency_score = float(
+            np.clip(100.0 - (mean_duration - 30.0) * 2.0, 0.0, 100.0)
+        )
         col1, col2 = st.columns(2)
 
         with col1:
-            st.metric("平均时长", f"{duration_stats['mean']:.1f} 分钟")
+            st.metric("平均时长", f"{mean_duration:.1f} 分钟")
             st.metric("效率评分", f"{efficiency_score:.1f}/100")
         with col2:
-            st.metric("最短时长", f"{duration_stats['min']:.1f} 分钟")
-            st.metric("最长时长", f"{duration_stats['max']:.1f} 分钟")
+            st.metric("最短时长", f"{np.nanmin(durations):.1f} 分钟")
+            st.metric("最长时长", f"{np.nanmax(durations):.1f} 分钟")
 
-        self._create_plotly_chart(
-            px.histogram,
-            sample_data,
-            x="时长",
+        fig = self._histogram_figure(
+            sample_data["时长"],
             title="会议时长分布",
-            nbins=20,
-            color_discrete_sequence=["#1f77b4"],
+            xaxis_title="时长",
+            color="#1f77b4",
         )
-        st.plotly_chart(st.session_state.last_chart, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True)
 
     def _show_status_efficiency(self, sample_data: pd.DataFrame) -> None:
         """Display status efficiency visualization and metrics.
@@ -872,25 +1480,28 @@ class AnalysisPage:
         Args:
             sample_data: DataFrame containing status information.
         """
-        status_counts = sample_data["状态"].value_counts()
-        completion_rate = (status_counts.get("完成", 0) / len(sample_data)) * 100
+        status_counts = _value_counts(sample_data["状态"])
+        counts = dict(zip(status_counts.index, status_counts.to_numpy().tolist()))
+        completed = counts.get("完成", 0)
+        completion_rate = (completed / len(sample_data)) * 100
         col1, col2 = st.columns(2)
 
         with col1:
             st.metric("总任务数", len(sample_data))
             st.metric("完成率", f"{completion_rate:.1f}%")
         with col2:
-            st.metric("已完成", status_counts.get("完成", 0))
-            st.metric("进行中", status_counts.get("进行中", 0))
+            st.metric("已完成", completed)
+            st.metric("进行中", counts.get("进行中", 0))
 
-        self._create_plotly_chart(
-            px.pie,
-            values=status_counts.values,
-            names=status_counts.index,
-            title="任务状态分布",
-            color_discrete_sequence=px.colors.qualitative.Set3,
+        fig = go.Figure(
+            go.Pie(
+                values=status_counts.values,
+                labels=status_counts.index,
+                marker_colors=px.colors.qualitative.Set3,
+            ),
+            layout=dict(template=_chart_template(), title="任务状态分布"),
         )
-        st.plotly_chart(st.session_state.last_chart, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True)
 
     def _show_correlation_visualizations(
         self, sample_data: pd.DataFrame, query: str
@@ -902,30 +1513,26 @@ class AnalysisPage:
             query: User query.
         """
         st.markdown("#### 🔗 关联关系可视化")
-        numeric_cols = sample_data.select_dtypes(include=["number"]).columns
+        numeric_cols = _numeric_cols(sample_data)
 
         if len(numeric_cols) >= 2:
-            self._create_plotly_chart(
-                px.imshow,
-                sample_data[numeric_cols].corr(),
-                title="数值字段相关性热力图",
-                color_continuous_scale="RdBu",
-                aspect="auto",
-                height=500,
+            st.plotly_chart(
+                _corr_heatmap(_corr(sample_data[numeric_cols]), _chart_template()),
+                use_container_width=True,
             )
-            st.plotly_chart(st.session_state.last_chart, use_container_width=True)
         else:
-            categorical_cols = sample_data.select_dtypes(include=["object"]).columns
+            categorical_cols = _categorical_cols(sample_data)
             if categorical_cols.any():
-                value_counts = sample_data[categorical_cols[0]].value_counts()
-                self._create_plotly_chart(
+                value_counts = _value_counts(sample_data[categorical_cols[0]])
+                fig = self._create_plotly_chart(
                     px.bar,
                     x=value_counts.index,
                     y=value_counts.values,
                     title=f"{categorical_cols[0]} 分布",
                     labels={"x": categorical_cols[0], "y": "数量"},
                 )
-                st.plotly_chart(st.session_state.last_chart, use_container_width=True)
+                if fig is not None:
+                    st.plotly_chart(fig, use_container_width=True)
 
     def _show_temporal_visualizations(
         self, sample_data: pd.DataFrame, query: str
@@ -937,43 +1544,19 @@ class AnalysisPage:
             query: User query.
         """
         st.markdown("#### 📅 时间模式可视化")
-        time_cols = self._find_time_columns(sample_data)
+        time_cols = _time_columns(sample_data)
 
         if time_cols:
             self._create_time_series_chart(sample_data, time_cols[0])
         else:
-            numeric_cols = sample_data.select_dtypes(include=["number"]).columns
+            numeric_cols = _numeric_cols(sample_data)
             if numeric_cols.any():
-                self._create_plotly_chart(
-                    px.histogram,
-                    sample_data,
-                    x=numeric_cols[0],
+                fig = self._histogram_figure(
+                    sample_data[numeric_cols[0]],
                     title=f"{numeric_cols[0]} 分布",
-                    nbins=20,
+                    xaxis_title=numeric_cols[0],
                 )
-                st.plotly_chart(st.session_state.last_chart, use_container_width=True)
-
-    def _find_time_columns(self, data: pd.DataFrame) -> list:
-        """Find time-related columns in the DataFrame.
-
-        Args:
-            data: DataFrame to analyze.
-
-        Returns:
-            List of column names that are time-related.
-        """
-        time_cols = []
-        for col in data.columns:
-            try:
-                if (
-                    pd.api.types.is_datetime64_any_dtype(data[col])
-                    or pd.to_datetime(data[col], errors="coerce").notna().sum()
-                    > len(data) * 0.5
-                ):
-                    time_cols.append(col)
-            except Exception:
-                continue
-        return time_cols
+                st.plotly_chart(fig, use_container_width=True)
 
     def _create_time_series_chart(self, data: pd.DataFrame, column: str) -> None:
         """Create a time series chart.
@@ -983,17 +1566,31 @@ class AnalysisPage:
             column: Name of the time column.
         """
         try:
-            time_data = pd.to_datetime(data[column], errors="coerce")
-            if not time_data.isna().all():
-                time_counts = time_data.dt.date.value_counts().sort_index()
-                self._create_plotly_chart(
-                    px.line,
-                    x=time_counts.index,
-                    y=time_counts.values,
-                    title=f"{column} 时间趋势",
-                    labels={"x": "日期", "y": "数量"},
+            time_counts = _daily_counts(data[column])
+            if len(time_counts) > MAX_LINE_POINTS:
+                keep = _lttb_indices(time_counts.to_numpy(), MAX_LINE_POINTS)
+                time_counts = time_counts.iloc[keep]
+            if not time_counts.empty:
+                # 点数较多时用 WebGL 渲染，避免浏览器绘制大量 SVG 节点
+                trace = (
+                    go.Scattergl
+                    if len(time_counts) > WEBGL_MIN_POINTS
+                    else go.Scatter
+                )
+                fig = go.Figure(
+                    trace(
+                        x=time_counts.index.to_numpy(),
+                        y=time_counts.to_numpy(),
+                        mode="lines",
+                    ),
+                    layout=dict(
+                        template=_chart_template(),
+                        title=f"{column} 时间趋势",
+                        xaxis_title="日期",
+                        yaxis_title="数量",
+                    ),
                 )
-                st.plotly_chart(st.session_state.last_chart, use_container_width=True)
+                st.plotly_chart(fig, use_container_width=True)
         except Exception as e:
             st.warning(f"无法处理时间字段 {column}: {e}")
 
@@ -1007,60 +1604,104 @@ class AnalysisPage:
             query: User query.
         """
         st.markdown("#### 📊 对比分析可视化")
-        categorical_cols = sample_data.select_dtypes(include=["object"]).columns
-        numeric_cols = sample_data.select_dtypes(include=["number"]).columns
+        categorical_cols = _categorical_cols(sample_data)
+        numeric_cols = _numeric_cols(sample_data)
 
         if categorical_cols.any() and numeric_cols.any():
-            self._create_plotly_chart(
+            # 箱线图需要逐点数据，数值列能无损表示时按 float32 发送以减半前端负载
+            box_data = pd.DataFrame(
+                {
+                    categorical_cols[0]: sample_data[categorical_cols[0]],
+                    numeric_cols[0]: _as_float32_if_exact(
+                        sample_data[numeric_cols[0]]
+                    ),
+                }
+            )
+            fig = self._create_plotly_chart(
                 px.box,
-                sample_data,
+                box_data,
                 x=categorical_cols[0],
                 y=numeric_cols[0],
                 title=f"{categorical_cols[0]} vs {numeric_cols[0]} 对比",
             )
-            st.plotly_chart(st.session_state.last_chart, use_container_width=True)
+            if fig is not None:
+                st.plotly_chart(fig, use_container_width=True)
         else:
             if categorical_cols.any():
-                value_counts = sample_data[categorical_cols[0]].value_counts()
-                self._create_plotly_chart(
+                value_counts = _value_counts(sample_data[categorical_cols[0]])
+                fig = self._create_plotly_chart(
                     px.bar,
                     x=value_counts.index,
                     y=value_counts.values,
                     title=f"{categorical_cols[0]} 分布",
                     labels={"x": categorical_cols[0], "y": "数量"},
                 )
-                st.plotly_chart(st.session_state.last_chart, use_container_width=True)
+                if fig is not None:
+                    st.plotly_chart(fig, use_container_width=True)
             elif numeric_cols.any():
-                self._create_plotly_chart(
-                    px.histogram,
-                    sample_data,
-                    x=numeric_cols[0],
+                fig = self._histogram_figure(
+                    sample_data[numeric_cols[0]],
                     title=f"{numeric_cols[0]} 分布",
-                    nbins=20,
+                    xaxis_title=numeric_cols[0],
                 )
-                st.plotly_chart(st.session_state.last_chart, use_container_width=True)
+                st.plotly_chart(fig, use_container_width=True)
+
+    def _histogram_figure(
+        self,
+        values: pd.Series,
+        title: str,
+        xaxis_title: str,
+        yaxis_title: str = "数量",
+        color: Optional[str] = None,
+    ) -> go.Figure:
+        """Build a histogram from server-side bins.
+
+        Only the bin counts are sent to the browser instead of every value.
+
+        Args:
+            values: Numeric values to bin.
+            title: Chart title.
+            xaxis_title: X-axis title.
+            yaxis_title: Y-axis title.
+            color: Optional bar color.
+
+        Returns:
+            Bar figure with one bar per bin.
+        """
+        centers, widths, counts = _histogram_bins(values)
+        return go.Figure(
+            go.Bar(x=centers, y=counts, width=widths, marker_color=color),
+            layout=dict(
+                template=_chart_template(),
+                title=title,
+                xaxis_title=xaxis_title,
+                yaxis_title=yaxis_title,
+            ),
+        )
 
-    def _create_plotly_chart(self, chart_func: Callable, *args, **kwargs) -> None:
-        """Create a Plotly chart with consistent styling and store in session state.
+    def _create_plotly_chart(
+        self, chart_func: Callable, *args, **kwargs
+    ) -> Optional[go.Figure]:
+        """Create a Plotly chart with the shared chart template.
 
         Args:
-            chart_func: Plotly Express chart function (e.g., px.bar, px.histogram).
+            chart_func: Plotly Express chart function (e.g., px.bar, px.pie).
             *args: Positional arguments for the chart function.
             **kwargs: Keyword arguments for the chart function, including title and other configurations.
+
+        Returns:
+            The created figure, or None if the chart could not be created.
         """
         try:
-            kwargs.setdefault("height", 400)
-            fig = chart_func(*args, **kwargs)
-            fig.update_layout(
-                margin=dict(l=20, r=20, t=50, b=20),
-                showlegend=True,
-                font=dict(size=12),
-                title_x=0.5,
-            )
-            st.session_state.last_chart = fig
+            kwargs.setdefault("template", _chart_template())
+            name = getattr(chart_func, "__name__", "")
+            if getattr(px, name, None) is chart_func:
+                return _px_figure(name, *args, **kwargs)
+            return chart_func(*args, **kwargs)
         except Exception as e:
             logger.error(f"Failed to create Plotly chart: {e}")
             st.warning(f"创建图表失败: {e}")
+            return None
 
     def _handle_pandasai_response(
         self, response: Any, sample_data: pd.DataFrame, query: str
@@ -1076,26 +1717,109 @@ class AnalysisPage:
             Boolean indicating if charts were displayed.
         """
         try:
-            if isinstance(response, (go.Figure, dict)) and "data" in response:
-                st.plotly_chart(response, use_container_width=True)
-                return True
-            elif (
-                isinstance(response, (list, tuple))
-                and len(response) > 0
-                and isinstance(response[0], go.Figure)
-            ):
-                st.plotly_chart(response[0], use_container_width=True)
-                return True
-            else:
-                st.info("未检测到图表信息，创建基础可视化")
-                self._create_fallback_charts(sample_data, query)
-                return True
+            return self._render_pandasai_response(response, sample_data, query)
         except Exception as e:
             logger.warning(f"Failed to handle PandasAI response: {e}")
             st.warning(f"处理PandasAI响应失败: {e}")
             self._create_fallback_charts(sample_data, query)
             return True
 
+    @singledispatchmethod
+    def _render_pandasai_response(
+        self, response: Any, sample_data: pd.DataFrame, query: str
+    ) -> bool:
+        """Render a PandasAI response, dispatching on its type.
+
+        Responses without a recognizable chart fall back to basic charts.
+
+        Args:
+            response: PandasAI response object.
+            sample_data: DataFrame analyzed.
+            query: User query.
+
+        Returns:
+            Boolean indicating if charts were displayed.
+        """
+        return self._render_unrecognized_response(sample_data, query)
+
+    @_render_pandasai_response.register
+    def _render_figure_response(
+        self, response: go.Figure, sample_data: pd.DataFrame, query: str
+    ) -> bool:
+        """Render a Plotly figure returned by PandasAI.
+
+        Args:
+            response: Plotly figure produced by the agent.
+            sample_data: DataFrame analyzed.
+            query: User query.
+
+        Returns:
+            Always True, since the figure itself is displayed.
+        """
+        st.plotly_chart(response, use_container_width=True)
+        return True
+
+    @_render_pandasai_response.register
+    def _render_dict_response(
+        self, response: dict, sample_data: pd.DataFrame, query: str
+    ) -> bool:
+        """Render a figure dict returned by PandasAI.
+
+        Dicts without a ``data`` key are not figures and fall back to basic
+        charts.
+
+        Args:
+            response: Dict response, a Plotly figure spec when it has ``data``.
+            sample_data: DataFrame analyzed.
+            query: User query.
+
+        Returns:
+            Boolean indicating if charts were displayed.
+        """
+        if "data" not in response:
+            return self._render_unrecognized_response(sample_data, query)
+        st.plotly_chart(response, use_container_width=True)
+        return True
+
+    @_render_pandasai_response.register(list)
+    @_render_pandasai_response.register(tuple)
+    def _render_sequence_response(
+        self, response: Any, sample_data: pd.DataFrame, query: str
+    ) -> bool:
+        """Render the first figure of a list or tuple returned by PandasAI.
+
+        Sequences that do not start with a Plotly figure fall back to basic
+        charts.
+
+        Args:
+            response: List or tuple response.
+            sample_data: DataFrame analyzed.
+            query: User query.
+
+        Returns:
+            Boolean indicating if charts were displayed.
+        """
+        if response and isinstance(response[0], go.Figure):
+            st.plotly_chart(response[0], use_container_width=True)
+            return True
+        return self._render_unrecognized_response(sample_data, query)
+
+    def _render_unrecognized_response(
+        self, sample_data: pd.DataFrame, query: str
+    ) -> bool:
+        """Show basic charts for a response that carries no chart.
+
+        Args:
+            sample_data: DataFrame analyzed.
+            query: User query.
+
+        Returns:
+            Boolean indicating if charts were displayed.
+        """
+        st.info("未检测到图表信息，创建基础可视化")
+        self._create_fallback_charts(sample_data, query)
+        return True
+
     def _create_fallback_charts(self, sample_data: pd.DataFrame, query: str) -> None:
         """Create fallback charts when AI analysis fails.
 
@@ -1105,109 +1829,147 @@ class AnalysisPage:
         """
         try:
             st.info(TEXTS["fallback_info"])
-            numeric_cols = sample_data.select_dtypes(include=["number"]).columns
-            categorical_cols = sample_data.select_dtypes(include=["object"]).columns
-
-            query_lower = query.lower()
-            if "时长" in query_lower or "duration" in query_lower:
-                if "时长" in sample_data.columns:
-                    self._create_plotly_chart(
-                        px.histogram,
-                        sample_data,
-                        x="时长",
-                        title="会议时长分布",
-                        labels={"时长": "时长（分钟）", "count": "会议数量"},
-                        nbins=20,
-                        color_discrete_sequence=["#1f77b4"],
-                    )
-                    st.plotly_chart(
-                        st.session_state.last_chart, use_container_width=True
-                    )
-                elif "duration_minutes" in sample_data.columns:
-                    self._create_plotly_chart(
-                        px.histogram,
-                        sample_data,
-                        x="duration_minutes",
-                        title="会议时长分布",
-                        labels={
-                            "duration_minutes": "时长（分钟）",
-                            "count": "会议数量",
-                        },
-                        nbins=20,
-                        color_discrete_sequence=["#1f77b4"],
-                    )
-                    st.plotly_chart(
-                        st.session_state.last_chart, use_container_width=True
-                    )
-                elif numeric_cols.any():
-                    self._create_plotly_chart(
-                        px.histogram,
-                        sample_data,
-                        x=numeric_cols[0],
-                        title=f"{numeric_cols[0]} 分布",
-                        nbins=20,
-                    )
-                    st.plotly_chart(
-                        st.session_state.last_chart, use_container_width=True
-                    )
-
-            elif "状态" in query_lower or "status" in query_lower:
-                if "状态" in sample_data.columns:
-                    status_counts = sample_data["状态"].value_counts()
-                    self._create_plotly_chart(
-                        px.pie,
-                        values=status_counts.values,
-                        names=status_counts.index,
-                        title="状态分布",
-                        color_discrete_sequence=px.colors.qualitative.Set3,
-                    )
-                    st.plotly_chart(
-                        st.session_state.last_chart, use_container_width=True
-                    )
-                elif categorical_cols.any():
-                    value_counts = sample_data[categorical_cols[0]].value_counts()
-                    self._create_plotly_chart(
-                        px.bar,
-                        x=value_counts.index,
-                        y=value_counts.values,
-                        title=f"{categorical_cols[0]} 分布",
-                        labels={"x": categorical_cols[0], "y": "数量"},
-                    )
-                    st.plotly_chart(
-                        st.session_state.last_chart, use_container_width=True
-                    )
-            else:
-                if numeric_cols.any():
-                    self._create_plotly_chart(
-                        px.histogram,
-                        sample_data,
-                        x=numeric_cols[0],
-                        title=f"{numeric_cols[0]} 分布",
-                        nbins=20,
-                    )
-                    st.plotly_chart(
-                        st.session_state.last_chart, use_container_width=True
-                    )
-                elif categorical_cols.any():
-                    value_counts = sample_data[categorical_cols[0]].value_counts()
-                    self._create_plotly_chart(
-                        px.bar,
-                        x=value_counts.index,
-                        y=value_counts.values,
-                        title=f"{categorical_cols[0]} 分布",
-                        labels={"x": categorical_cols[0], "y": "数量"},
-                    )
-                    st.plotly_chart(
-                        st.session_state.last_chart, use_container_width=True
-                    )
-                else:
-                    st.warning(TEXTS["no_visualizable_cols"])
+            numeric_cols = _numeric_cols(sample_data)
+            categorical_cols = _categorical_cols(sample_data)
+
+            matched = {
+                match.lastgroup
+                for match in FALLBACK_CHART_PATTERN.finditer(query.lower())
+            }
+            handler_name = next(
+                (name for group, name in FALLBACK_CHART_ROUTES if group in matched),
+                "_fallback_default_chart",
+            )
+            fig = getattr(self, handler_name)(
+                sample_data, numeric_cols, categorical_cols
+            )
+            if fig is not None:
+                st.plotly_chart(fig, use_container_width=True)
         except Exception as e:
             logger.error(f"Failed to create fallback charts: {e}")
             st.warning(f"创建备用图表失败: {e}")
 
-    def _create_merged_dataset(
+    def _fallback_duration_chart(
+        self,
+        sample_data: pd.DataFrame,
+        numeric_cols: pd.Index,
+        categorical_cols: pd.Index,
+    ) -> Optional[go.Figure]:
+        """Build the fallback chart for duration queries.
+
+        Args:
+            sample_data: DataFrame to visualize.
+            numeric_cols: Numeric columns of sample_data.
+            categorical_cols: Categorical columns of sample_data.
+
+        Returns:
+            Duration histogram, or None if there is nothing to plot.
+        """
+        for col in ("时长", "duration_minutes"):
+            if col in sample_data.columns:
+                return self._histogram_figure(
+                    sample_data[col],
+                    title="会议时长分布",
+                    xaxis_title="时长（分钟）",
+                    yaxis_title="会议数量",
+                    color="#1f77b4",
+                )
+        if numeric_cols.any():
+            return self._numeric_fallback_chart(sample_data, numeric_cols[0])
+        return None
+
+    def _fallback_status_chart(
+        self,
+        sample_data: pd.DataFrame,
+        numeric_cols: pd.Index,
+        categorical_cols: pd.Index,
+    ) -> Optional[go.Figure]:
+        """Build the fallback chart for status queries.
+
+        Args:
+            sample_data: DataFrame to visualize.
+            numeric_cols: Numeric columns of sample_data.
+            categorical_cols: Categorical columns of sample_data.
+
+        Returns:
+            Status pie chart, or None if there is nothing to plot.
+        """
+        if "状态" in sample_data.columns:
+            status_counts = _value_counts(sample_data["状态"])
+            return self._create_plotly_chart(
+                px.pie,
+                values=status_counts.values,
+                names=status_counts.index,
+                title="状态分布",
+                color_discrete_sequence=px.colors.qualitative.Set3,
+            )
+        if categorical_cols.any():
+            return self._categorical_fallback_chart(sample_data, categorical_cols[0])
+        return None
+
+    def _fallback_default_chart(
         self,
+        sample_data: pd.DataFrame,
+        numeric_cols: pd.Index,
+        categorical_cols: pd.Index,
+    ) -> Optional[go.Figure]:
+        """Build the fallback chart when no keyword matches the query.
+
+        Args:
+            sample_data: DataFrame to visualize.
+            numeric_cols: Numeric columns of sample_data.
+            categorical_cols: Categorical columns of sample_data.
+
+        Returns:
+            Distribution chart of the first usable column, or None.
+        """
+        if numeric_cols.any():
+            return self._numeric_fallback_chart(sample_data, numeric_cols[0])
+        if categorical_cols.any():
+            return self._categorical_fallback_chart(sample_data, categorical_cols[0])
+        st.warning(TEXTS["no_visualizable_cols"])
+        return None
+
+    def _numeric_fallback_chart(
+        self, sample_data: pd.DataFrame, col: str
+    ) -> Optional[go.Figure]:
+        """Build a histogram of a numeric column.
+
+        Args:
+            sample_data: DataFrame to visualize.
+            col: Numeric column to plot.
+
+        Returns:
+            Histogram figure.
+        """
+        return self._histogram_figure(
+            sample_data[col], title=f"{col} 分布", xaxis_title=col
+        )
+
+    def _categorical_fallback_chart(
+        self, sample_data: pd.DataFrame, col: str
+    ) -> Optional[go.Figure]:
+        """Build a bar chart of the value counts of a categorical column.
+
+        Args:
+            sample_data: DataFrame to visualize.
+            col: Categorical column to plot.
+
+        Returns:
+            Bar chart figure, or None on failure.
+        """
+        value_counts = _value_counts(sample_data[col])
+        return self._create_plotly_chart(
+            px.bar,
+            x=value_counts.index,
+            y=value_counts.values,
+            title=f"{col} 分布",
+            labels={"x": col, "y": "数量"},
+        )
+
+    @staticmethod
+    @st.cache_data(show_spinner=False, max_entries=4)
+    def _create_merged_dataset(
         meetings_df: pd.DataFrame,
         tasks_df: pd.DataFrame,
         users_df: pd.DataFrame,
@@ -1215,6 +1977,11 @@ class AnalysisPage:
     ) -> pd.DataFrame:
         """Create a merged dataset from all data sources with standardized data types.
 
+        Low-cardinality text columns are stored as ``category`` and the numeric
+        columns as ``float32`` to keep the merged frame compact. The result is
+        cached on the content of the four source frames, so reruns only pay
+        for hashing them.
+
         Args:
             meetings_df: Meetings DataFrame.
             tasks_df: Tasks DataFrame.
@@ -1226,136 +1993,127 @@ class AnalysisPage:
         """
         merged_data = []
         default_values = {
-            "数据源": str,
+            "数据源": "category",
             "记录ID": str,
             "标题": str,
-            "时长": float,
-            "状态": str,
+            "时长": "float32",
+            "状态": "category",
             "创建时间": str,
-            "会议室": str,
+            "会议室": "category",
             "组织者": str,
-            "类型": str,
-            "优先级": str,
+            "类型": "category",
+            "优先级": "category",
             "截止日期": str,
             "负责人": str,
-            "部门": str,
+            "部门": "category",
             "用户名": str,
             "姓名": str,
-            "角色": str,
+            "角色": "category",
             "邮箱": str,
             "名称": str,
-            "容量": float,
+            "容量": "float32",
         }
 
-        def safe_get(row, key, default=""):
-            value = row.get(key, default)
-            return str(value) if value is not None else default
+        def as_str(df: pd.DataFrame, key: str):
+            return df[key].fillna("").astype(str) if key in df.columns else ""
+
+        def as_float(df: pd.DataFrame, key: str):
+            # 无法解析的数值记为 NaN，而不是让整个合并失败
+            if key not in df.columns:
+                return 0.0
+            return pd.to_numeric(df[key], errors="coerce", downcast="float")
 
         if not meetings_df.empty:
-            for _, meeting in meetings_df.iterrows():
-                merged_data.append(
+            merged_data.append(
+                pd.DataFrame(
                     {
                         "数据源": "会议",
-                        "记录ID": safe_get(meeting, "id"),
-                        "标题": safe_get(meeting, "title"),
-                        "时长": float(meeting.get("duration_minutes", 0)),
-                        "状态": safe_get(meeting, "status"),
-                        "创建时间": safe_get(meeting, "created_datetime"),
-                        "会议室": safe_get(meeting, "room_id"),
-                        "组织者": safe_get(meeting, "organizer_id"),
+                        "记录ID": as_str(meetings_df, "id"),
+                        "标题": as_str(meetings_df, "title"),
+                        "时长": as_float(meetings_df, "duration_minutes"),
+                        "状态": as_str(meetings_df, "status"),
+                        "创建时间": as_str(meetings_df, "created_datetime"),
+                        "会议室": as_str(meetings_df, "room_id"),
+                        "组织者": as_str(meetings_df, "organizer_id"),
                         "类型": "会议记录",
-                    }
+                    },
+                    index=meetings_df.index,
                 )
+            )
 
         if not tasks_df.empty:
-            for _, task in tasks_df.iterrows():
-                merged_data.append(
+            merged_data.append(
+                pd.DataFrame(
                     {
                         "数据源": "任务",
-                        "记录ID": safe_get(task, "id"),
-                        "标题": safe_get(task, "title"),
-                        "优先级": safe_get(task, "priority"),
-                        "状态": safe_get(task, "status"),
-                        "创建时间": safe_get(task, "created_datetime"),
-                        "截止日期": safe_get(task, "deadline"),
-                        "负责人": safe_get(task, "assignee_id"),
-                        "部门": safe_get(task, "department"),
+                        "记录ID": as_str(tasks_df, "id"),
+                        "标题": as_str(tasks_df, "title"),
+                        "优先级": as_str(tasks_df, "priority"),
+                        "状态": as_str(tasks_df, "status"),
+                        "创建时间": as_str(tasks_df, "created_datetime"),
+                        "截止日期": as_str(tasks_df, "deadline"),
+                        "负责人": as_str(tasks_df, "assignee_id"),
+                        "部门": as_str(tasks_df, "department"),
                         "类型": "任务记录",
-                    }
+                    },
+                    index=tasks_df.index,
                 )
+            )
 
         if not users_df.empty:
-            for _, user in users_df.iterrows():
-                merged_data.append(
+            merged_data.append(
+                pd.DataFrame(
                     {
                         "数据源": "用户",
-                        "记录ID": safe_get(user, "id"),
-                        "用户名": safe_get(user, "username"),
-                        "姓名": safe_get(user, "name"),
-                        "部门": safe_get(user, "department"),
-                        "角色": safe_get(user, "role"),
-                        "邮箱": safe_get(user, "email"),
+                        "记录ID": as_str(users_df, "id"),
+                        "用户名": as_str(users_df, "username"),
+                        "姓名": as_str(users_df, "name"),
+                        "部门": as_str(users_df, "department"),
+                        "角色": as_str(users_df, "role"),
+                        "邮箱": as_str(users_df, "email"),
                         "类型": "用户记录",
-                    }
+                    },
+                    index=users_df.index,
                 )
+            )
 
         if not rooms_df.empty:
-            for _, room in rooms_df.iterrows():
-                merged_data.append(
+            merged_data.append(
+                pd.DataFrame(
                     {
                         "数据源": "会议室",
-                        "记录ID": safe_get(room, "id"),
-                        "名称": safe_get(room, "name"),
-                        "容量": float(room.get("capacity", 0)),
-                        "状态": safe_get(room, "status"),
+                        "记录ID": as_str(rooms_df, "id"),
+                        "名称": as_str(rooms_df, "name"),
+                        "容量": as_float(rooms_df, "capacity"),
+                        "状态": as_str(rooms_df, "status"),
                         "类型": "会议室记录",
-                    }
+                    },
+                    index=rooms_df.index,
                 )
+            )
 
-        df = pd.DataFrame(merged_data)
-        for col, dtype in default_values.items():
-            if col in df.columns:
-                df[col] = df[col].astype(dtype)
-        return df
+        if not merged_data:
+            return pd.DataFrame()
+
+        # 先对齐到统一列序，concat 无需再逐个合并列索引
+        columns = [
+            col
+            for col in default_values
+            if any(col in part.columns for part in merged_data)
+        ]
+        df = pd.concat(
+            [part.reindex(columns=columns) for part in merged_data],
+            ignore_index=True,
+        )
+        return df.astype({col: default_values[col] for col in columns})
 
-    def _get_built_in_queries(self, data_source: str) -> Dict[str, str]:
+    def _get_built_in_queries(self, data_source: str) -> Mapping[str, str]:
         """Return built-in query options based on data source.
 
         Args:
             data_source: Selected data source.
 
         Returns:
-            Dictionary of built-in query options.
+            Read-only mapping of built-in query options.
         """
-        queries = {}
-        if data_source == "全部数据":
-            queries = {
-                "跨数据源综合分析": "分析所有数据源的整体情况，包括各数据源的记录数量、分布特征，以及数据质量评估。生成可视化图表展示数据源分布和关键指标对比。",
-                "业务效率深度分析": "深入分析会议时长分布、任务完成率、用户活跃度等关键业务指标。计算效率评分，识别效率瓶颈，并提供优化建议。生成相关图表支持分析结果。",
-                "数据关联性挖掘": "分析会议、任务、用户、会议室之间的潜在关联关系。识别数据间的依赖性和影响因子，发现业务模式。使用热力图和网络图展示关联强度。",
-            }
-        elif data_source == "会议数据":
-            queries = {
-                "会议时长分布": "分析会议时长的分布情况，展示主要的时长区间。",
-                "会议数量趋势": "统计每月的会议数量变化趋势。",
-                "会议室使用统计": "统计各会议室的使用次数。",
-            }
-        elif data_source == "任务数据":
-            queries = {
-                "任务完成率统计": "统计任务的完成情况，计算完成率。",
-                "任务优先级分布": "分析不同优先级任务的分布情况。",
-                "部门任务统计": "统计各部门的任务分配情况。",
-            }
-        elif data_source == "用户数据":
-            queries = {
-                "用户角色分布": "分析用户在不同角色的分布情况。",
-                "部门人员统计": "统计各部门的人员分布情况。",
-                "用户活跃度": "分析用户的活跃程度。",
-            }
-        elif data_source == "会议室数据":
-            queries = {
-                "会议室容量分布": "分析会议室容量的分布情况。",
-                "会议室状态统计": "统计不同状态会议室的数量。",
-                "会议室使用率": "分析会议室的使用效率。",
-            }
-        return queries
+        return BUILT_IN_QUERIES.get(data_source, NO_BUILT_IN_QUERIES)
@@ -4,17 +4,100 @@ Contains the AI-powered booking page implementation for the smart meeting system
 """
 
 import streamlit as st
-import pandas as pd
-from datetime import datetime, timedelta
-import os
-import sys
 import uuid
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
-from langgraph.checkpoint.memory import InMemorySaver
-from langgraph.types import Command
 
-from smartmeeting.agent import create_graph
-from smartmeeting.data_manager import DataManager
+# 欢迎页的静态HTML卡片，模块加载时构建一次
+WELCOME_HERO_HTML = """
+<div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            padding: 2rem;
+            border-radius: 16px;
+            color: white;
+            margin-bottom: 2rem;">
+    <h2 style="color: white; margin-bottom: 1rem;">🎉 欢迎使用AI会议预订助手！</h2>
+    <p style="font-size: 1.1rem; margin-bottom: 1.5rem;">
+        我是您的智能会议管理助手，可以帮助您快速预订、管理和查询会议室。
+    </p>
+    <p style="font-size: 1rem; opacity: 0.9;">
+        请在下方的聊天框中告诉我您的需求，我会为您提供最合适的解决方案。
+    </p>
+</div>
+"""
+
+WELCOME_FEATURES_HTML = """
+<div style="background: white;
+            padding: 1.5rem;
+            border-radius: 12px;
+            border: 1px solid #e5e7eb;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+    <h4 style="color: #1f2937; margin-bottom: 1rem;">💡 常用功能</h4>
+    <ul style="color: #6b7280; line-height: 1.6;">
+        <li>🔍 <strong>查找会议室</strong><br>
+        "帮我找个明天下午2点的会议室，需要10个人"</li>
+        <li>📅 <strong>预订会议室</strong><br>
+        "预订会议室A，明天上午9点到11点"</li>
+        <li>📋 <strong>查看预订</strong><br>
+        "查看我的所有预订"</li>
+        <li>❌ <strong>取消预订</strong><br>
+        "取消明天的会议预订"</li>
+    </ul>
+</div>
+"""
+
+WELCOME_CAPABILITIES_HTML = """
+<div style="background: white;
+            padding: 1.5rem;
+            border-radius: 12px;
+            border: 1px solid #e5e7eb;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+    <h4 style="color: #1f2937; margin-bottom: 1rem;">⚡ 智能特性</h4>
+    <ul style="color: #6b7280; line-height: 1.6;">
+        <li>🤖 <strong>自然语言理解</strong><br>
+        支持中文自然语言输入</li>
+        <li>🔧 <strong>智能推荐</strong><br>
+        根据需求自动推荐最佳会议室</li>
+        <li>🛡️ <strong>安全确认</strong><br>
+        重要操作需要用户确认</li>
+        <li>📊 <strong>实时状态</strong><br>
+        实时显示会议室可用状态</li>
+    </ul>
+</div>
+"""
+
+
+class StreamingMarkdown:
+    """流式渲染Markdown：已完成的段落各自渲染一次，只刷新末尾未完成的段落"""
+
+    def __init__(self, container):
+        self.container = container
+        self.trailing = container.empty()
+        self.pending = ""
+
+    def write(self, text):
+        """追加文本，并固定其中已完成的段落"""
+        self.pending += text
+        *blocks, tail = self.pending.split("\n\n")
+        if not blocks:
+            return
+
+        # 代码块内的空行不算段落结束，未闭合的代码块继续累积
+        stable = ""
+        for block in blocks:
+            candidate = f"{stable}\n\n{block}" if stable else block
+            if candidate.count("```") % 2:
+                stable = candidate
+                continue
+            self.trailing.markdown(candidate)
+            self.trailing = self.container.empty()
+            stable = ""
+        self.pending = f"{stable}\n\n{tail}" if stable else tail
+
+    def refresh(self, cursor=""):
+        """刷新末尾段落"""
+        if self.pending:
+            self.trailing.markdown(self.pending + cursor)
+        else:
+            self.trailing.empty()
 
 
 class BookingPage:
@@ -34,6 +117,10 @@ class BookingPage:
     def initialize_graph(self):
         """初始化或获取缓存的图实例"""
         if "graph" not in st.session_state:
+            # 延迟导入智能体及 langgraph，未打开预订页时不加载
+            from langgraph.checkpoint.memory import InMemorySaver
+            from smartmeeting.agent import create_graph
+
             try:
                 # 使用内存存储器以在页面刷新间保持状态
                 memory = InMemorySaver()
@@ -63,6 +150,17 @@ class BookingPage:
         """获取图配置"""
         return {"configurable": {"thread_id": st.session_state.thread_id}}
 
+    def get_current_state(self):
+        """获取当前对话状态，每次页面运行只读取一次检查点"""
+        graph = st.session_state.graph
+        config = self.get_config()
+
+        try:
+            return graph.get_state(config)
+        except Exception as e:
+            st.error(f"❌ 获取对话状态失败: {e}")
+            return None
+
     def render_message(self, message):
         """渲染单条消息"""
         if isinstance(message, HumanMessage):
@@ -75,13 +173,12 @@ class BookingPage:
                 with st.chat_message("assistant"):
                     st.markdown(message.content)
 
-    def render_message_history(self):
+    def render_message_history(self, current_state):
         """渲染历史消息"""
-        graph = st.session_state.graph
-        config = self.get_config()
+        if current_state is None:
+            return
 
         try:
-            current_state = graph.get_state(config)
             messages = current_state.values.get("messages", [])
 
             for message in messages:
@@ -90,14 +187,12 @@ class BookingPage:
         except Exception as e:
             st.error(f"❌ 获取消息历史失败: {e}")
 
-    def render_hitl_confirmation(self):
+    def render_hitl_confirmation(self, current_state):
         """渲染人工介入确认卡片"""
-        graph = st.session_state.graph
-        config = self.get_config()
+        if current_state is None:
+            return
 
         try:
-            current_state = graph.get_state(config)
-
             # 检查是否有中断
             if current_state.next and len(current_state.next) > 0:
                 messages = current_state.values.get("messages", [])
@@ -134,252 +229,205 @@ class BookingPage:
                                     use_container_width=True,
                                     type="primary",
                                 ):
-                                    # 创建streaming展示容器
-                                    streaming_container = st.empty()
-
-                                    with streaming_container.container():
-                                        st.markdown("### 🔄 执行过程")
-                                        progress_placeholder = st.empty()
-                                        response_placeholder = st.empty()
-
-                                        try:
-                                            progress_text = ""
-                                            final_response = ""
-
-                                            # 使用正确的streaming方式 - 修复：resume应该接受列表
-                                            for chunk in graph.stream(
-                                                Command(resume=[{"type": "accept"}]),
-                                                config,
-                                                stream_mode="updates",
-                                            ):
-                                                # chunk的格式是 {node_name: node_data}
-                                                for (
-                                                    node_name,
-                                                    node_data,
-                                                ) in chunk.items():
-                                                    progress_text += f"📍 **{node_name}**: 处理中...\n"
-                                                    progress_placeholder.markdown(
-                                                        progress_text
-                                                    )
-
-                                                    # 如果node_data包含messages，提取AI响应
-                                                    if (
-                                                        isinstance(node_data, dict)
-                                                        and "messages" in node_data
-                                                    ):
-                                                        messages = node_data["messages"]
-                                                        if messages:
-                                                            for message in messages:
-                                                                if (
-                                                                    isinstance(
-                                                                        message,
-                                                                        AIMessage,
-                                                                    )
-                                                                    and message.content
-                                                                ):
-                                                                    final_response = (
-                                                                        message.content
-                                                                    )
-                                                                    response_placeholder.markdown(
-                                                                        f"**🤖 AI响应**:\n{final_response}"
-                                                                    )
-
-                                            st.success("✅ 操作已完成")
-                                            st.rerun()
-
-                                        except Exception as e:
-                                            st.error(f"❌ 执行失败: {e}")
+                                    self.resume_interrupt(
+                                        "accept",
+                                        "### 🔄 执行过程",
+                                        st.success,
+                                        "✅ 操作已完成",
+                                        "❌ 执行失败",
+                                    )
 
                             with col2:
                                 if st.button("❌ 拒绝操作", use_container_width=True):
-                                    # 创建streaming展示容器
-                                    streaming_container = st.empty()
-
-                                    with streaming_container.container():
-                                        st.markdown("### 🚫 取消过程")
-                                        progress_placeholder = st.empty()
-                                        response_placeholder = st.empty()
-
-                                        try:
-                                            progress_text = ""
-                                            final_response = ""
-
-                                            # 使用正确的streaming方式 - 修复：resume应该接受列表
-                                            for chunk in graph.stream(
-                                                Command(resume=[{"type": "ignore"}]),
-                                                config,
-                                                stream_mode="updates",
-                                            ):
-                                                # chunk的格式是 {node_name: node_data}
-                                                for (
-                                                    node_name,
-                                                    node_data,
-                                                ) in chunk.items():
-                                                    progress_text += f"📍 **{node_name}**: 处理中...\n"
-                                                    progress_placeholder.markdown(
-                                                        progress_text
-                                                    )
-
-                                                    # 如果node_data包含messages，提取AI响应
-                                                    if (
-                                                        isinstance(node_data, dict)
-                                                        and "messages" in node_data
-                                                    ):
-                                                        messages = node_data["messages"]
-                                                        if messages:
-                                                            for message in messages:
-                                                                if (
-                                                                    isinstance(
-                                                                        message,
-                                                                        AIMessage,
-                                                                    )
-                                                                    and message.content
-                                                                ):
-                                                                    final_response = (
-                                                                        message.content
-                                                                    )
-                                                                    response_placeholder.markdown(
-                                                                        f"**🤖 AI响应**:\n{final_response}"
-                                                                    )
-
-                                            st.warning("🚫 操作已取消")
-                                            st.rerun()
-
-                                        except Exception as e:
-                                            st.error(f"❌ 取消失败: {e}")
+                                    self.resume_interrupt(
+                                        "ignore",
+                                        "### 🚫 取消过程",
+                                        st.warning,
+                                        "🚫 操作已取消",
+                                        "❌ 取消失败",
+                                    )
 
         except Exception as e:
             st.error(f"❌ 检查中断状态失败: {e}")
 
     def render_booking_confirmation(self, tool_args):
         """渲染预订确认详情"""
-        st.markdown("**📅 会议室预订**")
+        lines = ["**📅 会议室预订**"]
 
         # 获取房间详情
         room_id = tool_args.get("room_id")
         if room_id:
-            rooms_df = self.data_manager.get_dataframe("rooms")
-            room = rooms_df[rooms_df["room_id"] == room_id]
-            if not room.empty:
-                room = room.iloc[0]
-                st.markdown(
+            # 直接按ID查找，避免为单条记录构建整个会议室DataFrame
+            room = self.data_manager.get_room_by_id(room_id)
+            if room is not None:
+                lines.append(
                     f"🏢 **会议室**: {room['room_name']} ({room.get('building_id', '未知')}-{room.get('floor', '未知')}楼)"
                 )
-                st.markdown(f"👥 **容量**: {room['capacity']}人")
+                lines.append(f"👥 **容量**: {room['capacity']}人")
                 if room.get("equipment"):
-                    st.markdown(f"🔧 **设备**: {room['equipment']}")
+                    lines.append(f"🔧 **设备**: {room['equipment']}")
             else:
-                st.markdown(f"🏢 **会议室ID**: {room_id}")
+                lines.append(f"🏢 **会议室ID**: {room_id}")
 
         # 其他预订信息
         if "start_time" in tool_args:
-            st.markdown(f"⏰ **开始时间**: {tool_args['start_time']}")
+            lines.append(f"⏰ **开始时间**: {tool_args['start_time']}")
         if "end_time" in tool_args:
-            st.markdown(f"⏰ **结束时间**: {tool_args['end_time']}")
+            lines.append(f"⏰ **结束时间**: {tool_args['end_time']}")
         if "title" in tool_args:
-            st.markdown(f"📝 **会议标题**: {tool_args['title']}")
+            lines.append(f"📝 **会议标题**: {tool_args['title']}")
+
+        # 合并为一次 markdown 输出
+        st.markdown("\n\n".join(lines))
 
     def render_cancellation_confirmation(self, tool_args):
         """渲染取消确认详情"""
-        st.markdown("**🗑️ 取消预订**")
+        lines = ["**🗑️ 取消预订**"]
 
         if "booking_ids" in tool_args:
             booking_ids = tool_args["booking_ids"]
             if isinstance(booking_ids, list):
-                st.markdown(
+                lines.append(
                     f"📋 **待取消的预订ID**: {', '.join(map(str, booking_ids))}"
                 )
             else:
-                st.markdown(f"📋 **待取消的预订ID**: {booking_ids}")
+                lines.append(f"📋 **待取消的预订ID**: {booking_ids}")
 
+        st.markdown("\n\n".join(lines))
         st.warning("⚠️ 此操作不可撤销")
 
     def render_alteration_confirmation(self, tool_args):
         """渲染修改确认详情"""
-        st.markdown("**✏️ 修改预订**")
+        lines = ["**✏️ 修改预订**"]
 
         if "booking_id" in tool_args:
-            st.markdown(f"📋 **预订ID**: {tool_args['booking_id']}")
+            lines.append(f"📋 **预订ID**: {tool_args['booking_id']}")
 
-        st.markdown("**📝 修改内容**:")
+        lines.append("**📝 修改内容**:")
+        changes = []
         for key, value in tool_args.items():
             if key != "booking_id" and value is not None:
                 if key == "new_room_id":
-                    st.markdown(f"- **新会议室ID**: {value}")
+                    changes.append(f"- **新会议室ID**: {value}")
                 elif key == "new_start_time":
-                    st.markdown(f"- **新开始时间**: {value}")
+                    changes.append(f"- **新开始时间**: {value}")
                 elif key == "new_end_time":
-                    st.markdown(f"- **新结束时间**: {value}")
+                    changes.append(f"- **新结束时间**: {value}")
+        if changes:
+            lines.append("\n".join(changes))
+
+        st.markdown("\n\n".join(lines))
+
+    def resume_interrupt(self, resume_type, title, notify, notice, fail_message):
+        """恢复被中断的图执行，流式展示过程，完成后重新运行页面"""
+        from langgraph.types import Command
+
+        graph = st.session_state.graph
+
+        # 创建streaming展示容器
+        with st.empty().container():
+            st.markdown(title)
+            panel = st.empty()
+
+            try:
+                # 使用正确的streaming方式 - 修复：resume应该接受列表
+                self.stream_resume(
+                    graph.stream(
+                        Command(resume=[{"type": resume_type}]),
+                        self.get_config(),
+                        stream_mode="updates",
+                    ),
+                    panel,
+                )
+
+                notify(notice)
+                st.rerun()
+
+            except Exception as e:
+                st.error(f"{fail_message}: {e}")
+
+    def stream_resume(self, chunks, panel):
+        """展示中断恢复后的执行进度，每个流式事件合并为一次界面刷新"""
+        progress_text = ""
+        final_response = ""
+
+        def render():
+            # 进度与AI响应写入同一个占位符，每次刷新只发送一条更新
+            if final_response:
+                panel.markdown(f"{progress_text}\n\n**🤖 AI响应**:\n{final_response}")
+            else:
+                panel.markdown(progress_text)
+
+        # chunk的格式是 {node_name: node_data}
+        for chunk in chunks:
+            for node_name, node_data in chunk.items():
+                progress_text += f"📍 **{node_name}**: 处理中...\n"
+
+                # 如果node_data包含messages，提取AI响应
+                if isinstance(node_data, dict) and node_data.get("messages"):
+                    for message in node_data["messages"]:
+                        if isinstance(message, AIMessage) and message.content:
+                            final_response = message.content
+
+            # 事件内的所有节点处理完再刷新一次，阻塞等待下个事件前界面已是最新
+            render()
 
     def process_stream_events(self, events):
         """处理流式事件"""
-        ai_placeholder = st.empty()
-        full_response = ""
+        ai_response = StreamingMarkdown(st.container())
+        # 本地引用，避免循环中反复经由 session_state 代理查找
+        containers = st.session_state.tool_status_containers
 
         for chunk in events:
+            replied = False
             # LangGraph流式 输出格式是 {node_name: node_data}
             for node_name, node_data in chunk.items():
-                if isinstance(node_data, dict) and "messages" in node_data:
-                    messages = node_data["messages"]
-                    for message in messages:
-                        if isinstance(message, AIMessage):
-                            if message.tool_calls:
-                                # 为工具调用创建状态容器
-                                for tool_call in message.tool_calls:
-                                    tool_call_id = tool_call["id"]
-                                    tool_name = tool_call["name"]
-
-                                    if (
-                                        tool_call_id
-                                        not in st.session_state.tool_status_containers
-                                    ):
-                                        status_container = st.status(
-                                            f"🔧 执行工具: {tool_name}",
-                                            state="running",
-                                            expanded=True,
-                                        )
-                                        st.session_state.tool_status_containers[
-                                            tool_call_id
-                                        ] = status_container
-
-                                        with status_container:
-                                            st.json(tool_call["args"])
-                            else:
-                                # 累积AI回复文本
-                                full_response += message.content
-                                ai_placeholder.markdown(full_response + "▌")
-
-                        elif isinstance(message, ToolMessage):
-                            tool_call_id = message.tool_call_id
-                            if tool_call_id in st.session_state.tool_status_containers:
-                                status_container = (
-                                    st.session_state.tool_status_containers[
-                                        tool_call_id
-                                    ]
-                                )
-                                status_container.update(state="complete")
-
-                                with status_container:
-                                    st.success("✅ 工具执行完成")
-                                    if message.content:
-                                        st.text(message.content)
+                if not isinstance(node_data, dict) or "messages" not in node_data:
+                    continue
+                for message in node_data["messages"]:
+                    if isinstance(message, AIMessage):
+                        # 为工具调用创建状态容器
+                        for tool_call in message.tool_calls:
+                            tool_call_id = tool_call["id"]
+                            if tool_call_id in containers:
+                                continue
+                            status_container = st.status(
+                                f"🔧 执行工具: {tool_call['name']}",
+                                state="running",
+                                expanded=True,
+                            )
+                            containers[tool_call_id] = status_container
+                            with status_container:
+                                st.json(tool_call["args"])
+
+                        if not message.tool_calls:
+                            # 累积AI回复文本，事件结束时统一刷新末尾段落
+                            ai_response.write(message.content)
+                            replied = True
+
+                    elif isinstance(message, ToolMessage):
+                        status_container = containers.get(message.tool_call_id)
+                        if status_container is not None:
+                            status_container.update(state="complete")
+                            with status_container:
+                                st.success("✅ 工具执行完成")
+                                if message.content:
+                                    st.text(message.content)
+
+            # 每个事件最多刷新一次回复，等待下个事件前展示已收到的全部文本
+            if replied:
+                ai_response.refresh("▌")
 
         # 显示最终回复
-        if full_response:
-            ai_placeholder.markdown(full_response)
+        ai_response.refresh()
 
         # 清空工具状态容器
         st.session_state.tool_status_containers = {}
 
     def handle_user_input(self):
         """处理用户输入"""
-        # 检查是否有示例查询
-        if (
-            hasattr(st.session_state, "example_query")
-            and st.session_state.example_query
-        ):
-            user_input = st.session_state.example_query
-            del st.session_state.example_query  # 清除示例查询
+        # 检查是否有示例查询，取出的同时清除
+        if user_input := st.session_state.pop("example_query", None):
 
             # 立即显示用户消息
             with st.chat_message("human"):
@@ -443,89 +491,26 @@ class BookingPage:
                 except Exception as e:
                     st.error(f"❌ 处理失败: {e}")
 
-    def show_welcome_message(self):
+    def show_welcome_message(self, current_state):
         """显示欢迎信息和使用提示"""
         # 检查是否是首次访问或没有历史消息
-        graph = st.session_state.graph
-        config = self.get_config()
-
         try:
-            current_state = graph.get_state(config)
             messages = current_state.values.get("messages", [])
 
             # 如果没有历史消息，显示欢迎信息
             if not messages:
                 # 欢迎信息卡片
                 with st.container():
-                    st.markdown(
-                        """
-                    <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                                padding: 2rem; 
-                                border-radius: 16px; 
-                                color: white; 
-                                margin-bottom: 2rem;">
-                        <h2 style="color: white; margin-bottom: 1rem;">🎉 欢迎使用AI会议预订助手！</h2>
-                        <p style="font-size: 1.1rem; margin-bottom: 1.5rem;">
-                            我是您的智能会议管理助手，可以帮助您快速预订、管理和查询会议室。
-                        </p>
-                        <p style="font-size: 1rem; opacity: 0.9;">
-                            请在下方的聊天框中告诉我您的需求，我会为您提供最合适的解决方案。
-                        </p>
-                    </div>
-                    """,
-                        unsafe_allow_html=True,
-                    )
+                    st.html(WELCOME_HERO_HTML)
 
                 # 使用提示卡片
                 col1, col2 = st.columns(2)
 
                 with col1:
-                    st.markdown(
-                        """
-                    <div style="background: white; 
-                                padding: 1.5rem; 
-                                border-radius: 12px; 
-                                border: 1px solid #e5e7eb; 
-                                box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                        <h4 style="color: #1f2937; margin-bottom: 1rem;">💡 常用功能</h4>
-                        <ul style="color: #6b7280; line-height: 1.6;">
-                            <li>🔍 <strong>查找会议室</strong><br>
-                            "帮我找个明天下午2点的会议室，需要10个人"</li>
-                            <li>📅 <strong>预订会议室</strong><br>
-                            "预订会议室A，明天上午9点到11点"</li>
-                            <li>📋 <strong>查看预订</strong><br>
-                            "查看我的所有预订"</li>
-                            <li>❌ <strong>取消预订</strong><br>
-                            "取消明天的会议预订"</li>
-                        </ul>
-                    </div>
-                    """,
-                        unsafe_allow_html=True,
-                    )
+                    st.html(WELCOME_FEATURES_HTML)
 
                 with col2:
-                    st.markdown(
-                        """
-                    <div style="background: white; 
-                                padding: 1.5rem; 
-                                border-radius: 12px; 
-                                border: 1px solid #e5e7eb; 
-                                box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                        <h4 style="color: #1f2937; margin-bottom: 1rem;">⚡ 智能特性</h4>
-                        <ul style="color: #6b7280; line-height: 1.6;">
-                            <li>🤖 <strong>自然语言理解</strong><br>
-                            支持中文自然语言输入</li>
-                            <li>🔧 <strong>智能推荐</strong><br>
-                            根据需求自动推荐最佳会议室</li>
-                            <li>🛡️ <strong>安全确认</strong><br>
-                            重要操作需要用户确认</li>
-                            <li>📊 <strong>实时状态</strong><br>
-                            实时显示会议室可用状态</li>
-                        </ul>
-                    </div>
-                    """,
-                        unsafe_allow_html=True,
-                    )
+                    st.html(WELCOME_CAPABILITIES_HTML)
 
                 # 快速开始示例
                 st.markdown("### 🚀 快速开始")
@@ -572,14 +557,17 @@ class BookingPage:
         # 初始化图
         self.initialize_graph()
 
+        # 三处渲染共用同一份对话状态
+        current_state = self.get_current_state()
+
         # 显示欢迎信息和使用提示
-        self.show_welcome_message()
+        self.show_welcome_message(current_state)
 
         # 渲染人工介入确认 - 优先检查并显示
-        self.render_hitl_confirmation()
+        self.render_hitl_confirmation(current_state)
 
         # 渲染历史消息
-        self.render_message_history()
+        self.render_message_history(current_state)
 
         # 处理用户输入
         self.handle_user_input()
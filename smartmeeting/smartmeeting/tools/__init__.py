@@ -21,6 +21,7 @@ from .llm import (
     setup_pandasai_llm,
     setup_chat_llm,
     create_pandasai_agent,
+    get_pandasai_llm,
     PandasAILLMDashScope,
 )
 from .lingji_ai import transcribe_file, get_nls_token
@@ -39,6 +40,7 @@ __all__ = [
     "setup_pandasai_llm",
     "setup_chat_llm",
     "create_pandasai_agent",
+    "get_pandasai_llm",
     "PandasAILLMDashScope",
     "transcribe_file",
     "get_nls_token",
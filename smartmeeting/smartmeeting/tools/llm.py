@@ -8,8 +8,14 @@ import openai
 import os
 import pandasai as pai
 from pandasai import Agent
+import streamlit as st
 
 LLM_CHAT_MODEL = "qwen-plus"
+# PandasAI 生成代码出错时的重试次数，每次重试再调用一次 LLM
+PANDASAI_MAX_RETRIES = 2
+# 单次 LLM HTTP 请求的超时（秒），客户端不再自行重试，超时后 chat 抛出异常由调用方回退。
+# 一次 agent.chat 最多等待 (PANDASAI_MAX_RETRIES + 1) * LLM_REQUEST_TIMEOUT = 60 秒
+LLM_REQUEST_TIMEOUT = 20
 
 
 class PandasAILLMDashScope(OpenAI):
@@ -26,13 +32,21 @@ class PandasAILLMDashScope(OpenAI):
         "qwen-plus-2025-04-28",
     ]
 
-    def __init__(self, api_token: str, model: str = "qwen3-30b-a3b", **kwargs):
+    def __init__(
+        self,
+        api_token: str,
+        model: str = "qwen3-30b-a3b",
+        request_timeout: float = LLM_REQUEST_TIMEOUT,
+        **kwargs,
+    ):
         """
         Initialize the PandasAILLMDashScope class with DashScope's API base and Qwen model.
 
         Args:
             api_token (str): DashScope API key.
             model (str): Qwen model name (e.g., 'qwen-plus').
+            request_timeout (float): Timeout in seconds for each API request.
+                Timed-out requests are not retried by the client.
             **kwargs: Additional parameters for the OpenAI client.
         """
         # Set DashScope's API base - using the correct endpoint
@@ -45,8 +59,15 @@ class PandasAILLMDashScope(OpenAI):
 
         # Force chat model client for Qwen models
         self._is_chat_model = True
+        self.request_timeout = request_timeout
         self.client = (
-            openai.OpenAI(**self._client_params).chat.completions
+            openai.OpenAI(
+                **{
+                    **self._client_params,
+                    "timeout": request_timeout,
+                    "max_retries": 0,
+                }
+            ).chat.completions
             if self.is_openai_v1()
             else openai.ChatCompletion
         )
@@ -114,7 +135,7 @@ def create_pandasai_agent(df, llm):
             {
                 "llm": llm,
                 "verbose": True,
-                "max_retries": 2,
+                "max_retries": PANDASAI_MAX_RETRIES,
                 "enforce_privacy": True,
                 "enable_logging": True,
                 "enable_plotting": True,
@@ -139,6 +160,21 @@ def create_pandasai_agent(df, llm):
         return None
 
 
+@st.cache_resource(show_spinner=False)
+def _cached_pandasai_llm():
+    """Create the DashScope LLM once; failures are cleared by get_pandasai_llm"""
+    return setup_pandasai_llm()
+
+
+def get_pandasai_llm():
+    """Return the shared DashScope LLM, created once per server process"""
+    llm = _cached_pandasai_llm()
+    if llm is None:
+        # 初始化失败时不缓存，下次重跑时重试
+        _cached_pandasai_llm.clear()
+    return llm
+
+
 def setup_chat_llm():
     """Setup Chat LLM for AI analysis"""
     api_key = os.getenv("DASHSCOPE_API_KEY")